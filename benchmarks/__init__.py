@@ -0,0 +1,6 @@
+"""
+GPMOID micro-benchmarks.
+
+    python -m benchmarks.run                  # compare against baselines
+    python -m benchmarks.run --save-baseline  # record new baselines
+"""
@@ -0,0 +1,190 @@
+"""
+import_time.py
+
+Cold-start import latency of the app pages and core services.
+
+Each target is imported in a fresh interpreter (python -X importtime),
+repeated --repeat times; the total import time is compared with the
+stored baseline (benchmarks/baselines.json, "import[...]" entries) the
+same way benchmarks.run compares its scenarios. Page targets import
+exactly the module-level imports of the page script.
+
+The heavy dependencies each target loads are listed as well, so an
+accidental eager import of openai / pydantic / pandas shows up even when
+it stays under the threshold.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --save-baseline
+"""
+
+import os
+import ast
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+from benchmarks.run import (
+    BASELINES_PATH,
+    REGRESSION_THRESHOLD,
+    load_baselines,
+    save_baselines,
+    compare_to_baselines,
+    format_report,
+)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = (
+    "streamlit_app.py",
+    "pages/2_Multi_Update.py",
+    "pages/3_Portfolio.py",
+)
+
+MODULES = (
+    "services.analysis_service",
+    "services.llm_service",
+    "services.comparison_service",
+    "services.memory_service",
+)
+
+HEAVY_DEPENDENCIES = ("openai", "pydantic", "pandas", "numpy")
+
+
+# -----------------------------
+# Targets
+# -----------------------------
+
+def page_imports(path):
+    """Modules a page script imports at module level (in order)."""
+    with open(os.path.join(REPO_ROOT, path), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+
+        modules.extend(name for name in names if name not in modules)
+
+    return modules
+
+
+def targets():
+    """{target name: modules to import}"""
+    found = {f"page:{os.path.basename(path)}": page_imports(path) for path in PAGES}
+    found.update({module: [module] for module in MODULES})
+    return found
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def measure_import(modules):
+    """
+    Imports modules in a fresh interpreter.
+    Returns (seconds, loaded top-level packages).
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=REPO_ROOT,
+        env=dict(os.environ, PYTHONPATH=REPO_ROOT),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    loaded = set()
+
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # column header
+
+        loaded.add(name.strip().split(".")[0])
+
+        # Unindented entries are the top-level imports of the statement
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+
+    return total_us / 1e6, loaded
+
+
+def measure_target(modules, repeat):
+    samples = []
+    loaded = set()
+
+    for _ in range(repeat):
+        seconds, loaded = measure_import(modules)
+        samples.append(seconds)
+
+    stats = {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "repeat": repeat,
+    }
+    return stats, sorted(dep for dep in HEAVY_DEPENDENCIES if dep in loaded)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start import time of the pages and core services."
+    )
+    parser.add_argument("--only", nargs="+", help="Targets to measure (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown before a target counts as regressed (0.25 = 25%%)")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the new baselines")
+    parser.add_argument("--json", dest="json_path", help="Also write the report rows to this JSON file")
+    args = parser.parse_args(argv)
+
+    all_targets = targets()
+    unknown = set(args.only or []) - set(all_targets)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))} (choose from {', '.join(all_targets)})")
+
+    results = []
+    heavy = {}
+    for name in args.only or all_targets:
+        stats, heavy[name] = measure_target(all_targets[name], args.repeat)
+        results.append((f"import[{name}]", stats))
+
+    rows = compare_to_baselines(results, load_baselines(args.baselines), args.threshold)
+    for row in rows:
+        row["heavy_dependencies"] = heavy[row["scenario"][len("import["):-1]]
+
+    print(format_report(rows))
+    print()
+    print("Heavy dependencies loaded at import:")
+    for row in rows:
+        print(f"  {row['scenario']:<42} {', '.join(row['heavy_dependencies']) or '—'}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+    if args.save_baseline:
+        save_baselines(results, args.baselines)
+        print(f"Baselines saved to {args.baselines}")
+        return 0
+
+    return 1 if any(row["status"] == "regressed" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+run.py
+
+Times the hot paths of the analysis pipeline on a seeded synthetic
+workload (benchmarks.synthetic) and compares each result with the stored
+baseline:
+
+- analyze_update   → full single-update path with a stubbed LLM
+- update_memory    → one update applied to memory at risks × periods scale
+- load_memory      → cold load of that memory
+- compare_updates  → multi-update comparison
+
+    python -m benchmarks.run
+    python -m benchmarks.run --risks 1000 --periods 50 --repeat 3
+    python -m benchmarks.run --save-baseline
+
+Each scenario is compared on its best-of-N time (least sensitive to
+noise from other processes); the median is reported alongside. A
+scenario regresses when it exceeds baseline × (1 + threshold)
+(--threshold, or GPMOID_BENCH_THRESHOLD; default 0.25); the run then
+exits non-zero. Baselines are machine-specific and not committed:
+record them (--save-baseline) on the machine that runs the comparison;
+until then every scenario is reported as "new".
+
+Runs in a scratch directory, so project memory is never touched.
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+
+from benchmarks import synthetic
+from services import analysis_service, memory_service
+from services.comparison_service import compare_updates
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+REGRESSION_THRESHOLD = float(os.getenv("GPMOID_BENCH_THRESHOLD", "0.25"))
+
+BENCH_PROJECT = "bench"
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+@contextmanager
+def scratch_dir():
+    """Runs the block in an empty working directory (memory/, cache/)."""
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="gpmoid-bench-")
+
+    os.chdir(path)
+    memory_service.invalidate_memory_cache()
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        memory_service.invalidate_memory_cache()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def stubbed_llm(raw_result):
+    """analysis_service.call_llm returns a copy of raw_result, instantly."""
+    original = analysis_service.call_llm
+    analysis_service.call_llm = lambda prompt, use_cache=True: copy.deepcopy(raw_result)
+    try:
+        yield
+    finally:
+        analysis_service.call_llm = original
+
+
+def measure(fn, repeat):
+    """Calls fn(i) repeat times; returns timing stats in seconds."""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "repeat": repeat,
+    }
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+
+def bench_analyze_update(args):
+    rng = random.Random(args.seed)
+    raw = synthetic.generate_raw_result(rng, risks=args.llm_risks)
+    texts = [synthetic.generate_update_text(rng) for _ in range(args.repeat)]
+    periods = synthetic.synthetic_periods(args.repeat)
+
+    with scratch_dir(), stubbed_llm(raw):
+        stats = measure(
+            lambda i: analysis_service.analyze_update(
+                texts[i], period_id=periods[i], project_id=BENCH_PROJECT
+            ),
+            args.repeat
+        )
+
+    return f"analyze_update[stub-llm,{args.llm_risks} risks]", stats
+
+
+def bench_memory(args):
+    """update_memory and load_memory on one pre-built large memory."""
+    scale = f"{memory_service.MEMORY_BACKEND},{args.risks}x{args.periods}"
+    results = []
+
+    memory = synthetic.generate_memory(args.seed, args.risks, args.periods)
+    rng = random.Random(args.seed)
+    risk_ids = list(memory["risks"])
+
+    # Periods after the generated horizon
+    periods = synthetic.synthetic_periods(args.periods + args.repeat)[args.periods:]
+    updates = [
+        synthetic.generate_analyzed_result(
+            rng, rng.sample(risk_ids, k=min(args.risks_per_update, len(risk_ids)))
+        )
+        for _ in range(args.repeat)
+    ]
+
+    with scratch_dir():
+        memory_service.save_memory(memory, BENCH_PROJECT)
+        del memory
+
+        def load_cold(_):
+            memory_service.invalidate_memory_cache(BENCH_PROJECT)
+            memory_service.load_memory(BENCH_PROJECT)
+
+        results.append((f"load_memory[{scale}]", measure(load_cold, args.repeat)))
+
+        results.append((
+            f"update_memory[{scale}]",
+            measure(
+                lambda i: memory_service.update_memory(
+                    updates[i], project_id=BENCH_PROJECT, period_id=periods[i]
+                ),
+                args.repeat
+            )
+        ))
+
+    return results
+
+
+def bench_compare_updates(args):
+    series = synthetic.generate_update_series(
+        args.seed,
+        updates=args.updates,
+        risk_pool=args.risks,
+        risks_per_update=args.risks_per_update
+    )
+
+    stats = measure(lambda _: compare_updates(series), args.repeat)
+    return f"compare_updates[{args.updates}x{args.risks_per_update}]", stats
+
+
+SCENARIOS = {
+    "analyze_update": bench_analyze_update,
+    "memory": bench_memory,
+    "compare_updates": bench_compare_updates,
+}
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    """Merges results into the baselines file (other scenarios are kept)."""
+    baselines = load_baselines(path)
+    for name, stats in results:
+        baselines[name] = {
+            "min_s": round(stats["min_s"], 6),
+            "median_s": round(stats["median_s"], 6),
+        }
+
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_to_baselines(results, baselines, threshold=REGRESSION_THRESHOLD):
+    """Returns one report row per result; status is ok / regressed / new."""
+    rows = []
+
+    for name, stats in results:
+        baseline = baselines.get(name, {}).get("min_s")
+
+        if baseline is None:
+            status, change = "new", None
+        else:
+            change = stats["min_s"] / baseline - 1 if baseline else 0.0
+            status = "regressed" if change > threshold else "ok"
+
+        rows.append({
+            "scenario": name,
+            "min_s": stats["min_s"],
+            "median_s": stats["median_s"],
+            "baseline_s": baseline,
+            "change": change,
+            "status": status,
+        })
+
+    return rows
+
+
+def format_report(rows):
+    lines = [
+        f"{'scenario':<44} {'best':>9} {'median':>9} {'baseline':>9} {'change':>7}  status"
+    ]
+
+    for row in rows:
+        baseline = f"{row['baseline_s']:.4f}" if row["baseline_s"] is not None else "—"
+        change = f"{row['change']:+.0%}" if row["change"] is not None else "—"
+        lines.append(
+            f"{row['scenario']:<44} {row['min_s']:>9.4f} {row['median_s']:>9.4f} "
+            f"{baseline:>9} {change:>7}  {row['status']}"
+        )
+
+    return "\n".join(lines)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark analysis, memory and comparison against stored baselines."
+    )
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--risks", type=int, default=10000, help="Risks in the synthetic memory / risk pool")
+    parser.add_argument("--periods", type=int, default=500, help="Periods of history in the synthetic memory")
+    parser.add_argument("--updates", type=int, default=100, help="Updates passed to compare_updates")
+    parser.add_argument("--risks-per-update", type=int, default=200, help="Risks in each synthetic analyzed update")
+    parser.add_argument("--llm-risks", type=int, default=5, help="Risks in the stubbed LLM response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Allowed slowdown before a scenario counts as regressed (0.25 = 25%%)")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the new baselines")
+    parser.add_argument("--json", dest="json_path", help="Also write the report rows to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.only or SCENARIOS:
+        outcome = SCENARIOS[name](args)
+        results.extend(outcome if isinstance(outcome, list) else [outcome])
+
+    rows = compare_to_baselines(results, load_baselines(args.baselines), args.threshold)
+    print(format_report(rows))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+    if args.save_baseline:
+        save_baselines(results, args.baselines)
+        print(f"Baselines saved to {args.baselines}")
+        return 0
+
+    return 1 if any(row["status"] == "regressed" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
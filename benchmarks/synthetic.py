@@ -0,0 +1,209 @@
+"""
+synthetic.py
+
+Seeded synthetic workload for benchmarks, modeled on sample_inputs/:
+stakeholder update texts, analyzed results (as returned by
+analyze_update) and pre-built longitudinal memory at scale.
+
+Everything is derived from a random.Random(seed), so the same seed
+always produces the same workload.
+"""
+
+import random
+
+from services.memory_service import MEMORY_VERSION
+from services.risk_history import PeriodTable, RiskHistory
+
+
+# -----------------------------
+# Text Fragments (sample_inputs style)
+# -----------------------------
+
+OPENINGS = [
+    "Project progress continues, however some concerns have emerged.",
+    "Overall progress remains broadly on track, however there are a few items "
+    "that may require leadership attention if not addressed promptly.",
+    "Project execution continues smoothly. All planned milestones are on track.",
+    "The program is in its initial phase and activities are progressing as planned.",
+]
+
+CONCERNS = [
+    "Approval from the external payments vendor has been delayed beyond "
+    "the originally agreed timeline.",
+    "Vendor confirmation delays are now impacting integration timelines and "
+    "pose a risk to the planned UAT start.",
+    "Engineering workload has increased due to parallel priorities and "
+    "sustained pressure may begin to affect morale.",
+    "The engineering team is currently handling multiple parallel deliverables "
+    "and capacity is constrained.",
+    "Infrastructure costs are trending above budget and an overrun is possible.",
+    "Defect counts from the last sprint have increased and some rework is pending.",
+    "Third party licensing terms are still under review with procurement.",
+]
+
+OUTLOOKS = [
+    "This risk should be monitored closely over the next two sprints.",
+    "At this stage, no immediate escalation is required.",
+    "If approval is not secured by next week, the UAT timeline will be impacted "
+    "and a schedule rebaseline may be required.",
+    "Delay confirmed; UAT at risk and this requires escalation.",
+    "There are no notable delivery or dependency risks to report this week.",
+]
+
+CATEGORIES = ["Schedule", "Cost", "People", "Quality", "Risk"]
+SEVERITIES = ["Low", "Medium", "High"]
+ATTENTION = ["Monitor", "Near-term", "Immediate"]
+STRATEGIES = ["Avoid", "Mitigate", "Transfer", "Accept"]
+OWNERS = ["Program Manager", "Engineering Manager", "Vendor Manager"]
+HEATS = ["Low", "Medium", "High"]
+
+
+# -----------------------------
+# Periods
+# -----------------------------
+
+def synthetic_periods(count, start_year=2020):
+    """count consecutive, lexically ordered period labels."""
+    return [
+        f"{start_year + i // 52}-W{i % 52 + 1:02d}"
+        for i in range(count)
+    ]
+
+
+# -----------------------------
+# Updates
+# -----------------------------
+
+def generate_update_text(rng: random.Random, concerns=3) -> str:
+    paragraphs = [rng.choice(OPENINGS)]
+    paragraphs.extend(rng.sample(CONCERNS, k=min(concerns, len(CONCERNS))))
+    paragraphs.append(rng.choice(OUTLOOKS))
+    return "\n\n".join(paragraphs)
+
+
+def generate_raw_risk(rng: random.Random, index: int) -> dict:
+    """One risk as the LLM returns it (before normalization)."""
+    return {
+        "description": f"Synthetic risk {index}: {rng.choice(CONCERNS)}",
+        "category": rng.choice(CATEGORIES),
+        "severity": rng.choice(SEVERITIES),
+        "response_strategy": rng.choice(STRATEGIES),
+        "attention_level": rng.choice(ATTENTION),
+        "suggested_owner": rng.choice(OWNERS),
+    }
+
+
+def generate_raw_result(rng: random.Random, risks=3) -> dict:
+    """A parsed LLM response for one update (stubbed LLM output)."""
+    return {
+        "subject": "Project Update: Synthetic Status",
+        "body": rng.choice(OPENINGS),
+        "warnings": rng.sample(["Delay", "Dependency", "Morale", "Cost"], k=2),
+        "risks": [generate_raw_risk(rng, i) for i in range(risks)],
+    }
+
+
+def generate_analyzed_result(rng: random.Random, risk_ids) -> dict:
+    """A post-processed analysis result covering the given risk_ids."""
+    risks = []
+    for risk_id in risk_ids:
+        risk = generate_raw_risk(rng, risk_id)
+        risk["risk_id"] = risk_id
+        risk["risk_heat"] = rng.choice(HEATS)
+        risks.append(risk)
+
+    return {
+        "subject": "Project Update: Synthetic Status",
+        "body": rng.choice(OPENINGS),
+        "warnings": [],
+        "risks": risks,
+        "escalation_summary": ["- synthetic"] if rng.random() < 0.3 else [],
+    }
+
+
+def generate_update_series(seed, updates, risk_pool, risks_per_update):
+    """
+    Analyzed results for consecutive updates, each drawing
+    risks_per_update risk_ids from a pool of risk_pool.
+    """
+    rng = random.Random(seed)
+    pool = [f"risk_{i:05d}" for i in range(risk_pool)]
+
+    return [
+        generate_analyzed_result(
+            rng, rng.sample(pool, k=min(risks_per_update, risk_pool))
+        )
+        for _ in range(updates)
+    ]
+
+
+# -----------------------------
+# Memory at Scale
+# -----------------------------
+
+def generate_memory(seed, risks, periods, mean_lifetime=20, project_id="bench"):
+    """
+    Longitudinal memory (current memory_version) holding `risks` risks over
+    a horizon of `periods` periods. Each risk is open for a contiguous
+    window (geometric length, mean_lifetime) and resolved afterwards,
+    like risks that come and go across a long program.
+    """
+    rng = random.Random(seed)
+    labels = synthetic_periods(periods)
+    table = PeriodTable(labels)
+    records = {}
+
+    for i in range(risks):
+        risk_id = f"risk_{i:05d}"
+        start = rng.randrange(periods)
+        length = 1
+        while length < periods - start and rng.random() > 1 / mean_lifetime:
+            length += 1
+
+        seen = labels[start:start + length]
+        heats = [rng.choice(HEATS) for _ in seen]
+
+        still_open = start + length >= periods
+        resolved_period = None if still_open else labels[min(start + length + 1, periods - 1)]
+
+        records[risk_id] = {
+            "risk_id": risk_id,
+            "category": rng.choice(CATEGORIES),
+
+            "first_seen_period": seen[0],
+            "last_seen_period": seen[-1],
+            "periods_open": len(seen),
+
+            "history": RiskHistory.from_lists(
+                table, seen, heats, [rng.choice(ATTENTION) for _ in seen]
+            ),
+
+            "escalation_count": sum(b > a for a, b in zip(heats, heats[1:])),
+            "de_escalation_count": sum(b < a for a, b in zip(heats, heats[1:])),
+            "recurrence_count": 0,
+
+            "current_status": "Stable" if still_open else "Resolved",
+
+            "confidence": {
+                "level": "High" if still_open else "Low",
+                "absence_count": 0 if still_open else 2,
+                "last_confident_period": seen[-1]
+            },
+
+            "resolution": {
+                "is_resolved": not still_open,
+                "resolved_period": resolved_period,
+                "resolution_reason": (
+                    None if still_open
+                    else "Confidence decayed after sustained absence"
+                )
+            }
+        }
+
+    return {
+        "memory_version": MEMORY_VERSION,
+        "project_id": project_id,
+        "last_updated_period": labels[-1],
+        "period_table": table,
+        "risks": records,
+    }
@@ -1,9 +1,17 @@
+from datetime import date, timedelta
+
 import streamlit as st
-import json
-import os
 
-from services.analysis_service import analyze_update
+from services.analysis_service import iter_analyze_updates
 from services.comparison_service import compare_updates
+from services.metrics import start_metrics_server
+from services.warmup import start_warmup
+from services.memory_service import (
+    DEFAULT_PROJECT_ID,
+    load_memory,
+    normalize_project_id,
+)
+from services.risk_history import last_heat, seen_in
 
 
 # -----------------------------
@@ -13,21 +21,21 @@ from services.comparison_service import compare_updates
 def build_demo_weeks(start_year=2026, start_week=1, count=5):
     """
     Build consecutive ISO week labels for demo / replay.
-    Example: 2026-W01, 2026-W02, ...
+    Example: 2026-W01, 2026-W02, ... (rolls over into the next ISO year)
     """
-    return [
-        f"{start_year}-W{start_week + i:02d}"
-        for i in range(count)
-    ]
+    monday = date.fromisocalendar(start_year, start_week, 1)
+
+    weeks = []
+    for i in range(count):
+        year, week, _ = (monday + timedelta(weeks=i)).isocalendar()
+        weeks.append(f"{year}-W{week:02d}")
 
+    return weeks
 
-def load_current_memory(project_id="default"):
-    path = os.path.join("memory", f"project_{project_id}.json")
-    if not os.path.exists(path):
-        return {}
 
-    with open(path, "r") as f:
-        return json.load(f)
+def load_current_memory(project_id=DEFAULT_PROJECT_ID):
+    # Shared in-process cache; re-reads only when the stored copy changes
+    return load_memory(project_id)
 
 
 def build_confidence_narrative(risk, current_period):
@@ -65,19 +73,18 @@ def build_confidence_narrative(risk, current_period):
     return None
 
 
-def build_confidence_trend(risk, recent_periods):
+def build_confidence_trend(memory, risk, recent_periods):
     """
     Reconstruct confidence trend for the last N periods (max 5),
     using deterministic replay rules aligned with memory v1.3.
     """
-    periods_seen = set(risk.get("periods_seen", []))
-    severity = risk.get("heat_history", ["Low"])[-1]
+    severity = last_heat(risk) or "Low"
 
     trend = []
     absence = 0
 
     for period in recent_periods:
-        if period in periods_seen:
+        if seen_in(memory, risk, period):
             absence = 0
             level = "High"
         else:
@@ -102,6 +109,47 @@ def render_confidence_strip(trend):
     return " → ".join(f"[{level}]" for level in trend)
 
 
+FILE_STATUS = {
+    "pending": "⏳ Analyzing…",
+    "analyzed": "✅ Analyzed",
+    "cached": "♻️ Unchanged (cached)",
+}
+
+HEAT_RANK = {"Low": 1, "Medium": 2, "High": 3}
+
+
+def render_file_row(slot, entry):
+    """
+    One status row per uploaded file; its analysis is shown as soon as
+    the file completes.
+    """
+    with slot.container():
+        line = f"{FILE_STATUS[entry['status']]} · **{entry['name']}** · {entry['period']}"
+
+        result = entry.get("result")
+        if result is None:
+            st.markdown(line)
+            return
+
+        risks = result.get("risks", [])
+        top_heat = max(
+            (r["risk_heat"] for r in risks),
+            key=lambda heat: HEAT_RANK.get(heat, 0),
+            default="None"
+        )
+        st.markdown(
+            f"{line} · {len(risks)} risk(s), highest heat {top_heat}"
+            + (" · 🚨 escalation" if result.get("escalation_summary") else "")
+        )
+
+        with st.expander(f"{entry['name']}: {result.get('subject', '')}", expanded=False):
+            for risk in risks:
+                st.markdown(
+                    f"- {risk['description']} "
+                    f"(Heat: {risk['risk_heat']}, Owner: {risk['suggested_owner']})"
+                )
+
+
 # -----------------------------
 # Session State Init
 # -----------------------------
@@ -115,6 +163,30 @@ if "demo_weeks" not in st.session_state:
 if "comparison" not in st.session_state:
     st.session_state.comparison = None
 
+if "file_results" not in st.session_state:
+    st.session_state.file_results = []
+
+
+# Prometheus /metrics endpoint, when GPMOID_METRICS_PORT is set (once per process)
+start_metrics_server()
+
+# Background warmup (client, schema, rule tables, memory), when GPMOID_WARMUP=on
+start_warmup()
+
+
+# -----------------------------
+# Project Selection
+# -----------------------------
+
+project_id = normalize_project_id(
+    st.sidebar.text_input(
+        "Project",
+        value=st.session_state.get("project_id", DEFAULT_PROJECT_ID),
+        help="Longitudinal memory is kept separately per project."
+    )
+)
+st.session_state.project_id = project_id
+
 
 # -----------------------------
 # Page Header
@@ -132,8 +204,10 @@ st.divider()
 # Upload Section
 # -----------------------------
 
+rows_rendered = False
+
 uploaded_files = st.file_uploader(
-    "Upload 2–5 stakeholder updates (.txt)",
+    "Upload two or more stakeholder updates (.txt)",
     type=["txt"],
     accept_multiple_files=True
 )
@@ -143,10 +217,6 @@ if uploaded_files:
         st.warning("Please upload at least two stakeholder updates.")
         st.stop()
 
-    if len(uploaded_files) > 5:
-        st.warning("Please upload a maximum of five updates.")
-        st.stop()
-
     if st.button("Analyze Updates"):
         # ----------------------------------
         # Option A: Explicit demo weeks
@@ -156,21 +226,42 @@ if uploaded_files:
         )
         st.session_state.show_demo_hint = True
 
-        analyzed_updates = []
-
-        with st.spinner("Analyzing and comparing updates..."):
-            for idx, file in enumerate(uploaded_files):
-                text = file.read().decode("utf-8")
-                period_id = st.session_state.demo_weeks[idx]
-
-                analysis = analyze_update(
-                    text,
-                    period_id=period_id
-                )
-
-                analyzed_updates.append(analysis)
+        texts = [
+            file.getvalue().decode("utf-8")
+            for file in uploaded_files
+        ]
+
+        entries = [
+            {"name": file.name, "period": week, "status": "pending", "result": None}
+            for file, week in zip(uploaded_files, st.session_state.demo_weeks)
+        ]
+        st.session_state.file_results = entries
+        st.session_state.comparison = None
+
+        st.subheader("🗂️ Updates")
+        slots = [st.empty() for _ in entries]
+        for slot, entry in zip(slots, entries):
+            render_file_row(slot, entry)
+
+        # LLM calls run concurrently and each file renders as it completes;
+        # memory is still updated in week order. Files analyzed before with
+        # the same content, week and project are served from the cache.
+        for index, result, cached in iter_analyze_updates(
+            texts,
+            period_ids=st.session_state.demo_weeks,
+            project_id=project_id
+        ):
+            entries[index]["result"] = result
+            entries[index]["status"] = "cached" if cached else "analyzed"
+            render_file_row(slots[index], entries[index])
+
+        with st.spinner("Comparing updates..."):
+            st.session_state.comparison = compare_updates(
+                [entry["result"] for entry in entries],
+                project_id=project_id
+            )
 
-            st.session_state.comparison = compare_updates(analyzed_updates)
+        rows_rendered = True
 
 
 # -----------------------------
@@ -189,6 +280,11 @@ if st.session_state.show_demo_hint:
 # Render Results (Persistent)
 # -----------------------------
 
+if st.session_state.file_results and not rows_rendered:
+    st.subheader("🗂️ Updates")
+    for entry in st.session_state.file_results:
+        render_file_row(st.empty(), entry)
+
 if st.session_state.comparison:
     comparison = st.session_state.comparison
 
@@ -255,7 +351,8 @@ if st.session_state.comparison:
     # Risk Comparison Table
     # -----------------------------
     with st.expander("📊 Risk Comparison Details", expanded=False):
-        table = comparison["risk_comparison_table"]
+        # Copies: the stored comparison is rendered again on every rerun
+        table = [dict(row) for row in comparison["risk_comparison_table"]]
 
         for row in table:
             row["Risk Trend"] = row.pop("trend")
@@ -273,7 +370,9 @@ if st.session_state.comparison:
     st.divider()
     st.subheader("📌 Risk Confidence Assessment")
 
-    memory = load_current_memory()
+    memory = load_current_memory(
+        comparison.get("project_id") or project_id
+    )
     risks = memory.get("risks", {})
     all_periods = st.session_state.demo_weeks[-5:]
     current_period = memory.get("last_updated_period")
@@ -289,7 +388,7 @@ if st.session_state.comparison:
             st.markdown(f"**{risk_name}**")
             st.write(narrative)
 
-            trend = build_confidence_trend(risk, all_periods)
+            trend = build_confidence_trend(memory, risk, all_periods)
             st.caption(
                 "Confidence Trend (last "
                 f"{len(all_periods)} periods):"
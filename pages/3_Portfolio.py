@@ -0,0 +1,68 @@
+import streamlit as st
+
+from services.memory_service import (
+    load_portfolio_index,
+    rebuild_portfolio_index,
+)
+
+
+# -----------------------------
+# Helpers (UI-only, deterministic)
+# -----------------------------
+
+HEAT_BADGE = {"High": "🔴 High", "Medium": "🟠 Medium", "Low": "🟢 Low"}
+
+
+def build_portfolio_rows(index):
+    """
+    One row per project, hottest and most loaded projects first.
+    Reads only the portfolio index, never the per-project memory.
+    """
+    heat_order = {"High": 3, "Medium": 2, "Low": 1}
+
+    entries = sorted(
+        index.values(),
+        key=lambda e: (
+            heat_order.get(e.get("max_heat"), 0),
+            e.get("active_risk_count", 0)
+        ),
+        reverse=True
+    )
+
+    return [
+        {
+            "Project": entry["project_id"],
+            "Last Period": entry.get("last_updated_period") or "—",
+            "Active Risks": entry.get("active_risk_count", 0),
+            "Max Heat": HEAT_BADGE.get(entry.get("max_heat"), "—"),
+        }
+        for entry in entries
+    ]
+
+
+# -----------------------------
+# Page Header
+# -----------------------------
+
+st.title("🗂️ Portfolio Overview")
+st.caption(
+    "Latest period, active risks and peak risk heat for every tracked project."
+)
+
+st.divider()
+
+
+# -----------------------------
+# Portfolio Table
+# -----------------------------
+
+index = load_portfolio_index()
+
+if index:
+    st.dataframe(build_portfolio_rows(index), width="stretch")
+else:
+    st.write("No projects have been analyzed yet.")
+
+if st.button("Rebuild Index"):
+    rebuild_portfolio_index()
+    st.rerun()
@@ -1,17 +1,34 @@
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel
 
 
-class Risk(BaseModel):
+Severity = Literal["Low", "Medium", "High"]
+ResponseStrategy = Literal["Avoid", "Mitigate", "Transfer", "Accept"]
+AttentionLevel = Literal["Immediate", "Near-term", "Monitor"]
+
+
+class LLMRisk(BaseModel):
+    """A risk as the LLM returns it (risk_heat is computed afterwards)."""
     description: str
     category: str
-    severity: str  # Low | Medium | High
-    response_strategy: str  # Avoid | Mitigate | Transfer | Accept
-    attention_level: str    # Immediate | Near-term | Monitor
+    severity: Severity
+    response_strategy: ResponseStrategy
+    attention_level: AttentionLevel
     suggested_owner: str    # PM | Program Manager | Engineering Manager | Vendor Manager
+
+
+class Risk(LLMRisk):
     risk_heat: str          # High | Medium | Low
 
 
+class LLMAnalysisResult(BaseModel):
+    """The LLM response for one update, before post-processing."""
+    subject: str
+    body: str
+    warnings: List[str]
+    risks: List[LLMRisk]
+
+
 class AnalysisResult(BaseModel):
     subject: str
     body: str
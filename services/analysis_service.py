@@ -1,11 +1,41 @@
-from services.llm_service import call_llm
+import os
+import copy
+import hashlib
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.llm_service import call_llm, stream_llm
+from services.llm_validation import parse_risk
 from services.fallback_service import fallback_analysis
-from services.memory_service import update_memory
-
-# -----------------------------
-# DEBUG FLAG
-# -----------------------------
-DEBUG = False
+from services.chunking import needs_chunking, split_sections
+from services.risk_classifier import derive_risk_id
+from services.keyword_matcher import (
+    TextSignals,
+    ESCALATION_KEYWORDS_STRONG,  # noqa: F401 (re-exported)
+)
+from services.memory_service import (
+    DEFAULT_PROJECT_ID,
+    normalize_period,
+    normalize_project_id,
+    update_memory_many,
+)
+from services.comparison_service import record_comparison
+from services.metrics import span, request_context
+
+# Rule decisions are logged at DEBUG level (stage latencies: services.metrics)
+log = logging.getLogger(__name__)
+
+# Concurrent LLM calls for analyze_updates_batch
+BATCH_MAX_WORKERS = int(os.getenv("GPMOID_BATCH_MAX_WORKERS", "5"))
+
+# Analyzed updates kept in-process by (text hash, period, project)
+ANALYSIS_CACHE_SIZE = int(os.getenv("GPMOID_ANALYSIS_CACHE_SIZE", "256"))
+
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
 
 
 # -----------------------------
@@ -22,67 +52,28 @@ def calculate_risk_heat(severity: str, attention: str) -> str:
     return "Low"
 
 
-# -----------------------------
-# Risk ID Derivation (CRITICAL)
-# -----------------------------
-
-def derive_risk_id(description: str, category: str) -> str:
-    """
-    Generates a stable risk_id for longitudinal memory.
-    Must remain deterministic.
-    """
-    text = f"{category} {description}".lower()
-
-    if "vendor" in text or "external" in text or "third party" in text:
-        return "vendor_dependency"
-    if "team" in text or "morale" in text or "capacity" in text or "bandwidth" in text:
-        return "team_capacity"
-    if "cost" in text or "budget" in text or "overrun" in text:
-        return "cost_overrun"
-    if "quality" in text or "defect" in text or "rework" in text:
-        return "quality_risk"
-
-    return category.lower().replace(" ", "_")
-
-
 # -----------------------------
 # Post-LLM Normalization
 # -----------------------------
 
-def normalize_risk_based_on_text(risk: dict, stakeholder_text: str) -> dict:
+def normalize_risk_based_on_text(risk: dict, stakeholder_text: str,
+                                 signals: TextSignals = None) -> dict:
     """
     Robust early-stage risk normalization.
     Guards against LLM over-escalation.
-    """
-    text = stakeholder_text.lower()
-
-    early_indicators = [
-        "initial",
-        "ongoing",
-        "pending",
-        "monitor",
-        "no immediate",
-        "at this stage",
-        "no major",
-        "early"
-    ]
 
-    impact_indicators = [
-        "uat at risk",
-        "timeline impacted",
-        "schedule rebaseline",
-        "delay confirmed",
-        "will impact",
-        "now at risk"
-    ]
+    signals: precomputed TextSignals for stakeholder_text (scanned if omitted).
+    """
+    if signals is None:
+        signals = TextSignals.from_text(stakeholder_text)
 
-    is_early = any(k in text for k in early_indicators)
-    has_real_impact = any(k in text for k in impact_indicators)
+    is_early = signals.is_early
+    has_real_impact = signals.has_real_impact
 
-    if DEBUG:
-        print("=== NORMALIZATION CHECK ===")
-        print("is_early:", is_early)
-        print("has_real_impact:", has_real_impact)
+    log.debug(
+        "normalization check: is_early=%s has_real_impact=%s",
+        is_early, has_real_impact
+    )
 
     if is_early and not has_real_impact:
         risk["severity"] = "Medium"
@@ -95,20 +86,14 @@ def normalize_risk_based_on_text(risk: dict, stakeholder_text: str) -> dict:
 # Escalation Logic
 # -----------------------------
 
-ESCALATION_KEYWORDS_STRONG = [
-    "uat at risk",
-    "schedule rebaseline",
-    "leadership attention",
-    "timeline will be impacted",
-    "requires escalation"
-]
-
-
-def build_escalation_summary(risks, stakeholder_text: str):
+def build_escalation_summary(risks, stakeholder_text: str,
+                             signals: TextSignals = None):
     escalations = []
-    text = stakeholder_text.lower()
 
-    strong_signal = any(k in text for k in ESCALATION_KEYWORDS_STRONG)
+    if signals is None:
+        signals = TextSignals.from_text(stakeholder_text)
+
+    strong_signal = signals.strong_signal
 
     for risk in risks:
         explicit_critical = (
@@ -127,18 +112,11 @@ def build_escalation_summary(risks, stakeholder_text: str):
 
 
 # -----------------------------
-# Main Analysis Entry
+# Prompt / Post-Processing
 # -----------------------------
 
-def analyze_update(text: str, period_id=None):
-    """
-    Analyze a single stakeholder update.
-
-    period_id:
-    - None → current logical week (default behavior)
-    - Provided → explicit logical period (Option A, demo/replay)
-    """
-    prompt = f"""
+def build_prompt(text: str) -> str:
+    return f"""
 You are a PMO AI assistant.
 
 Analyze the stakeholder update below and return STRICT JSON only.
@@ -165,50 +143,461 @@ Stakeholder update:
 {text}
 """
 
-    result = call_llm(prompt)
 
-    if result is None:
-        result = fallback_analysis()
+def finalize_risk(risk: dict, text: str, signals: TextSignals = None) -> dict:
+    """Normalize one raw LLM risk and attach risk_id + risk_heat."""
+    risk = normalize_risk_based_on_text(risk, text, signals)
+
+    risk["risk_id"] = derive_risk_id(
+        risk["description"],
+        risk["category"]
+    )
+
+    risk["risk_heat"] = calculate_risk_heat(
+        risk["severity"],
+        risk["attention_level"]
+    )
+
+    return risk
+
+
+def post_process_result(result, text: str, signals: TextSignals = None):
+    """
+    Deterministic post-LLM stage: normalization, risk_id, heat, escalation.
+    Falls back to the canned analysis when the LLM returned nothing.
 
-    normalized_risks = []
+    The text is scanned once (TextSignals) and the signals are returned
+    as result["text_signals"] for highlighting the triggering phrases.
+    """
+    with span("normalization"):
+        if result is None:
+            result = fallback_analysis()
 
-    for idx, risk in enumerate(result["risks"]):
-        if DEBUG:
-            print("====================================")
-            print(f"RISK INDEX: {idx}")
-            print("=== RAW LLM RISK ===")
-            print(risk)
+        if signals is None:
+            signals = TextSignals.from_text(text)
 
-        risk = normalize_risk_based_on_text(risk, text)
+        normalized_risks = []
 
-        risk["risk_id"] = derive_risk_id(
-            risk["description"],
-            risk["category"]
-        )
+        for idx, risk in enumerate(result["risks"]):
+            log.debug("risk %d raw: %s", idx, risk)
+
+            risk = finalize_risk(risk, text, signals)
+
+            log.debug("risk %d normalized: %s", idx, risk)
 
-        risk["risk_heat"] = calculate_risk_heat(
-            risk["severity"],
-            risk["attention_level"]
+            normalized_risks.append(risk)
+
+        result["risks"] = normalized_risks
+
+        result["escalation_summary"] = build_escalation_summary(
+            result["risks"], text, signals
         )
 
-        if DEBUG:
-            print("=== FINAL NORMALIZED RISK ===")
-            print(risk)
+        result["text_signals"] = signals.as_dict()
 
-        normalized_risks.append(risk)
+    return result
 
-    result["risks"] = normalized_risks
 
-    result["escalation_summary"] = build_escalation_summary(
-        result["risks"], text
-    )
+def timed_prompt(text: str) -> str:
+    with span("prompt_build"):
+        return build_prompt(text)
 
-    # -----------------------------
-    # 🔁 Longitudinal Memory Update
-    # -----------------------------
-    update_memory(
-        result,
-        period_id=period_id
-    )
+
+# -----------------------------
+# Chunked (Map-Reduce) Analysis
+# -----------------------------
+
+SEVERITY_ORDER = {"Low": 1, "Medium": 2, "High": 3}
+ATTENTION_ORDER = {"Monitor": 1, "Near-term": 2, "Immediate": 3}
+
+
+def merge_chunk_results(results):
+    """
+    Reduces raw LLM results of the sections of one report into one raw
+    result. Risks are merged by risk_id, keeping the highest severity and
+    the highest attention level seen in any section; the other fields come
+    from the most severe occurrence. None if no section produced a result.
+    """
+    results = [r for r in results if r is not None]
+    if not results:
+        return None
+
+    merged_risks = {}
+
+    for result in results:
+        for risk in result.get("risks", []):
+            risk_id = derive_risk_id(risk["description"], risk["category"])
+            current = merged_risks.get(risk_id)
+
+            if current is None:
+                merged_risks[risk_id] = dict(risk)
+                continue
+
+            attention = max(
+                current["attention_level"], risk["attention_level"],
+                key=lambda a: ATTENTION_ORDER.get(a, 0)
+            )
+
+            if SEVERITY_ORDER.get(risk["severity"], 0) > SEVERITY_ORDER.get(current["severity"], 0):
+                current = merged_risks[risk_id] = dict(risk)
+
+            current["attention_level"] = attention
+
+    warnings = []
+    for result in results:
+        for warning in result.get("warnings", []):
+            if warning not in warnings:
+                warnings.append(warning)
+
+    return {
+        "subject": results[0].get("subject", ""),
+        "body": "\n\n".join(r["body"] for r in results if r.get("body")),
+        "warnings": warnings,
+        "risks": list(merged_risks.values()),
+    }
+
+
+def request_analysis(text: str, chunked=None):
+    """
+    Raw LLM analysis of one update (None if unavailable).
+
+    chunked:
+    - None  → automatic: reports longer than CHUNK_MAX_CHARS are chunked
+    - True  → split into sections, analyze them in parallel, merge
+    - False → one prompt for the whole text
+
+    Chunked latency is bounded by the slowest section, not the whole
+    document; normalization and escalation still run once, over the
+    merged result and the full text (post_process_result).
+    """
+    if chunked is None:
+        chunked = needs_chunking(text)
+
+    sections = split_sections(text) if chunked else [text]
+    if len(sections) <= 1:
+        return call_llm(timed_prompt(text))
+
+    prompts = [timed_prompt(section) for section in sections]
+    workers = max(1, min(BATCH_MAX_WORKERS, len(prompts)))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(contextvars.copy_context().run, call_llm, prompt)
+            for prompt in prompts
+        ]
+        return merge_chunk_results([future.result() for future in futures])
+
+
+# -----------------------------
+# Longitudinal Recording
+# -----------------------------
+
+def record_updates(results_with_periods, project_id=DEFAULT_PROJECT_ID):
+    """
+    Applies analyzed updates ((result, period_id) pairs, in period order)
+    to longitudinal memory and folds them into the stored comparison
+    state. Every writer goes through here, so the two never drift apart.
+    Returns the memory events.
+    """
+    results_with_periods = list(results_with_periods)
+
+    events = update_memory_many(results_with_periods, project_id=project_id)
+    record_comparison(results_with_periods, project_id=project_id)
+
+    return events
+
+
+# -----------------------------
+# Main Analysis Entry
+# -----------------------------
+
+def analyze_update(text: str, period_id=None, project_id=DEFAULT_PROJECT_ID,
+                   chunked=None):
+    """
+    Analyze a single stakeholder update.
+
+    period_id:
+    - None → current logical week (default behavior)
+    - Provided → explicit logical period (Option A, demo/replay)
+
+    project_id: longitudinal memory partition the update is recorded in.
+
+    chunked: map-reduce over sections for long reports (see
+    request_analysis; default: automatic by length).
+
+    Stage latencies are recorded under one correlation id, also returned
+    as result["request_id"].
+    """
+    with request_context() as request_id:
+        result = post_process_result(request_analysis(text, chunked), text)
+        result["request_id"] = request_id
+
+        # -----------------------------
+        # 🔁 Longitudinal Memory Update
+        # -----------------------------
+        record_updates([(result, period_id)], project_id=project_id)
 
     return result
+
+
+# -----------------------------
+# Streaming Analysis Entry
+# -----------------------------
+
+def _stream_analysis(text: str, chunked=None):
+    """
+    stream_llm-style events for one update. Chunked reports are analyzed
+    section by section (request_analysis) and their merged result is
+    replayed as events once all sections are in.
+    """
+    if chunked is None:
+        chunked = needs_chunking(text)
+
+    if not chunked or len(split_sections(text)) <= 1:
+        yield from stream_llm(timed_prompt(text))
+        return
+
+    raw = request_analysis(text, chunked=True)
+
+    if raw is not None:
+        for key in ("subject", "body"):
+            yield ("field", key, raw.get(key, ""))
+        for warning in raw.get("warnings", []):
+            yield ("item", "warnings", warning)
+        for risk in raw.get("risks", []):
+            yield ("item", "risks", dict(risk))
+
+    yield ("done", None, raw)
+
+
+def analyze_update_stream(text: str, period_id=None, project_id=DEFAULT_PROJECT_ID,
+                          chunked=None):
+    """
+    Streaming variant of analyze_update for progressive rendering.
+
+    Yields (kind, value) events as the LLM response arrives:
+    - ("subject", str) / ("body", str)
+    - ("warning", str)      → one early warning signal
+    - ("risk", dict)        → one normalized risk (risk_id + risk_heat attached)
+    - ("escalation", str)   → escalation line triggered by that risk
+    - ("result", dict)      → final result, identical to analyze_update
+
+    The final result is always rebuilt from the complete response (or the
+    fallback), so partial events never reach longitudinal memory.
+    Long reports (chunked) emit their events once all sections are merged.
+    """
+    with request_context() as request_id:
+        raw = None
+        signals = TextSignals.from_text(text)
+
+        for kind, key, value in _stream_analysis(text, chunked):
+            if kind == "done":
+                raw = value
+
+            elif kind == "field" and key in ("subject", "body"):
+                yield (key, value)
+
+            elif kind == "item" and key == "warnings":
+                yield ("warning", value)
+
+            elif kind == "item" and key == "risks":
+                # Invalid items are not rendered; the final result is
+                # validated (and repaired) as a whole
+                risk = parse_risk(value)
+                if risk is None:
+                    log.debug("streamed risk dropped (invalid): %s", value)
+                    continue
+
+                risk = finalize_risk(risk, text, signals)
+                yield ("risk", risk)
+
+                for line in build_escalation_summary([risk], text, signals):
+                    yield ("escalation", line)
+
+        result = post_process_result(raw, text, signals)
+        result["request_id"] = request_id
+
+        record_updates([(result, period_id)], project_id=project_id)
+
+    yield ("result", result)
+
+
+# -----------------------------
+# Batch Analysis Entry
+# -----------------------------
+
+def analyze_updates_batch(texts, period_ids=None, max_workers=None,
+                          project_id=DEFAULT_PROJECT_ID, chunked=None):
+    """
+    Analyze several stakeholder updates with concurrent LLM calls.
+
+    LLM round trips fan out over a thread pool (max_workers, default
+    BATCH_MAX_WORKERS); post-processing and longitudinal memory updates
+    still run strictly in the given (period) order.
+    Returns results in input order.
+
+    Long reports are chunked per update (see request_analysis).
+    The whole batch shares one correlation id (result["request_id"]).
+    """
+    texts = list(texts)
+
+    if period_ids is None:
+        period_ids = [None] * len(texts)
+    if len(period_ids) != len(texts):
+        raise ValueError("period_ids must match the number of updates")
+
+    if not texts:
+        return []
+
+    workers = max(1, min(max_workers or BATCH_MAX_WORKERS, len(texts)))
+
+    with request_context() as request_id:
+        # Each worker call runs in a copy of this context (correlation id)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    request_analysis, text, chunked
+                )
+                for text in texts
+            ]
+            raw_results = [future.result() for future in futures]
+
+        results = [
+            post_process_result(raw, text)
+            for text, raw in zip(texts, raw_results)
+        ]
+        for result in results:
+            result["request_id"] = request_id
+
+        # One load / one write for the whole batch, applied in period order
+        record_updates(zip(results, period_ids), project_id=project_id)
+
+    return results
+
+
+# -----------------------------
+# Progressive Analysis Entry
+# -----------------------------
+
+def analysis_cache_key(text: str, period_id=None, project_id=DEFAULT_PROJECT_ID):
+    return (
+        hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        normalize_period(period_id),
+        normalize_project_id(project_id),
+    )
+
+
+def _cached_analysis(key):
+    with _analysis_cache_lock:
+        result = _analysis_cache.get(key)
+        if result is None:
+            return None
+        _analysis_cache.move_to_end(key)
+
+    return copy.deepcopy(result)
+
+
+def _cache_analysis(key, result):
+    with _analysis_cache_lock:
+        _analysis_cache[key] = copy.deepcopy(result)
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+
+
+def clear_analysis_cache():
+    with _analysis_cache_lock:
+        _analysis_cache.clear()
+
+
+def iter_analyze_updates(texts, period_ids=None, max_workers=None,
+                         project_id=DEFAULT_PROJECT_ID, chunked=None):
+    """
+    Progressive variant of analyze_updates_batch.
+
+    Yields (index, result, cached) as each update finishes, in completion
+    order, so callers can render results while the rest are in flight.
+    Memory is still updated strictly in the given (period) order: each
+    run of consecutive finished updates is applied as soon as it is
+    complete, before the update that completed it is yielded.
+
+    An update analyzed before in this process for the same text, period
+    and project is served from the analysis cache (cached=True) with no
+    LLM call and no memory write: its period is already in memory.
+    """
+    texts = list(texts)
+
+    if period_ids is None:
+        period_ids = [None] * len(texts)
+    if len(period_ids) != len(texts):
+        raise ValueError("period_ids must match the number of updates")
+
+    keys = [
+        analysis_cache_key(text, period_id, project_id)
+        for text, period_id in zip(texts, period_ids)
+    ]
+
+    results = [None] * len(texts)
+    fresh = [False] * len(texts)
+    applied = 0
+
+    def apply_ready():
+        nonlocal applied
+        end = applied
+        while end < len(results) and results[end] is not None:
+            end += 1
+
+        batch = [
+            (results[i], period_ids[i])
+            for i in range(applied, end) if fresh[i]
+        ]
+        if batch:
+            record_updates(batch, project_id=project_id)
+            for i in range(applied, end):
+                if fresh[i]:
+                    _cache_analysis(keys[i], results[i])
+
+        applied = end
+
+    with request_context() as request_id:
+        pending = []
+        for index, key in enumerate(keys):
+            cached = _cached_analysis(key)
+            if cached is None:
+                pending.append(index)
+                continue
+
+            results[index] = cached
+            apply_ready()
+            yield index, cached, True
+
+        if not pending:
+            return
+
+        workers = max(1, min(max_workers or BATCH_MAX_WORKERS, len(pending)))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run,
+                    request_analysis, texts[index], chunked
+                ): index
+                for index in pending
+            }
+
+            try:
+                for future in as_completed(futures):
+                    index = futures[future]
+
+                    result = post_process_result(future.result(), texts[index])
+                    result["request_id"] = request_id
+
+                    results[index] = result
+                    fresh[index] = True
+                    apply_ready()
+
+                    yield index, result, False
+            finally:
+                # Abandoned early (e.g. a Streamlit rerun): drop queued calls
+                pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,736 @@
+"""
+batch_ingest.py
+
+Offline bulk ingestion of historical stakeholder updates.
+
+A directory of updates is turned into a batch-request JSONL file (one
+chat.completions request per line, in the OpenAI Batch API format) and
+submitted through a pluggable batch executor:
+
+- local  → runs the requests against the configured client (or a local
+           stand-in via GPMOID_LLM_BASE_URL) on a thread pool
+- openai → the OpenAI Batch API (input file + batch, 24h window)
+
+Responses are collected as they arrive and fed through normalization and
+longitudinal memory strictly in period order. Progress is checkpointed
+in the work directory, so an interrupted run resumes where it stopped
+instead of paying for the calls again:
+
+    requests.jsonl    batch-request lines (custom_id → request body)
+    responses.jsonl   validated responses received so far
+    checkpoint.json   updates, periods, batch id, updates applied
+
+Failed or unusable responses are not recorded: application stops at the
+first update missing one, and rerunning resubmits only those requests.
+Nothing falls back to the canned analysis in project memory.
+
+Periods come from an ISO week in the file name (e.g. 2025-W07_update.txt),
+else consecutive ISO weeks in natural file-name order ending at the
+current week (or starting at --start-period). Periods must come after
+the last period already in the project's memory.
+
+    python -m services.batch_ingest sample_inputs/sample_inputs_1 --project alpha
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+import contextvars
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.llm_service import (
+    get_client,
+    batch_request_body,
+    complete_request,
+    validate_response,
+)
+from services.analysis_service import (
+    BATCH_MAX_WORKERS,
+    build_prompt,
+    merge_chunk_results,
+    post_process_result,
+    record_updates,
+)
+from services.chunking import needs_chunking, split_sections
+from services.memory_service import (
+    DEFAULT_PROJECT_ID,
+    current_period,
+    normalize_project_id,
+    load_memory,
+)
+from services.comparison_service import record_comparison
+from services.metrics import request_context
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+BATCH_DIR = "batches"
+CHECKPOINT_VERSION = 1
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_POLL_INTERVAL = float(os.getenv("GPMOID_BATCH_POLL_INTERVAL", "30"))
+
+_ISO_WEEK = re.compile(r"(\d{4})-?W(\d{2})", re.IGNORECASE)
+
+
+def work_dir_path(project_id=DEFAULT_PROJECT_ID):
+    return os.path.join(BATCH_DIR, normalize_project_id(project_id))
+
+
+# -----------------------------
+# Periods
+# -----------------------------
+
+def natural_key(path):
+    """week2 before week10."""
+    name = os.path.basename(path).lower()
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def shift_period(period, weeks):
+    """ISO week label moved by a number of weeks ("2026-W52" + 1 → "2027-W01")."""
+    match = _ISO_WEEK.fullmatch(period)
+    if not match:
+        raise ValueError(f"Not an ISO week label: {period}")
+
+    monday = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+    year, week, _ = (monday + timedelta(weeks=weeks)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def assign_periods(paths, start_period=None, known=None):
+    """
+    One period per update: an ISO week in the file name wins; otherwise
+    consecutive weeks in the given order, from start_period or ending at
+    the current week. Periods must come out strictly increasing.
+
+    known: {file name: period} from an earlier run (ignored when
+    start_period is given). Those files keep their period, and a file
+    without one follows the previous file's period, so rerunning over
+    the same files does not shift them with the calendar.
+    """
+    known = {} if start_period is not None else (known or {})
+
+    if start_period is None:
+        start_period = shift_period(current_period(), 1 - len(paths))
+
+    periods = []
+    for index, path in enumerate(paths):
+        name = os.path.basename(path)
+        match = _ISO_WEEK.search(name)
+        if match:
+            periods.append(f"{match.group(1)}-W{match.group(2)}")
+        elif name in known:
+            periods.append(known[name])
+        elif known and periods:
+            periods.append(shift_period(periods[-1], 1))
+        else:
+            periods.append(shift_period(start_period, index))
+
+    for earlier, later in zip(periods, periods[1:]):
+        if later <= earlier:
+            raise ValueError(f"Update periods out of order: {earlier} → {later}")
+
+    return periods
+
+
+def _week_key(period):
+    """(year, week) of an ISO week label, None for other period labels."""
+    match = _ISO_WEEK.fullmatch(period or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def check_period_order(project_id, last_period, first_period):
+    """
+    Raises ValueError if updates starting at first_period would replay
+    periods at or before memory's last period (out of order). Periods
+    that are not ISO weeks cannot be ordered and are not checked.
+    """
+    last, first = _week_key(last_period), _week_key(first_period)
+    if last is not None and first is not None and first <= last:
+        raise ValueError(
+            f"Memory of {project_id} already runs through {last_period}; "
+            f"updates from {first_period} would be applied out of order "
+            "(pass a later --start-period)"
+        )
+
+
+def discover_updates(input_dir, pattern="*.txt"):
+    """Update files of a directory in natural file-name order."""
+    paths = [
+        path for path in glob.glob(os.path.join(input_dir, pattern))
+        if os.path.isfile(path)
+    ]
+    return sorted(paths, key=natural_key)
+
+
+# -----------------------------
+# Batch Requests
+# -----------------------------
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def plan_batch(paths, periods, chunked=None):
+    """
+    Returns (updates, request_lines). Each update lists the custom_ids of
+    its requests: one per update, or one per section for long reports
+    (merged again by risk_id, see analysis_service.merge_chunk_results).
+    """
+    updates = []
+    lines = []
+
+    for index, (path, period) in enumerate(zip(paths, periods)):
+        text = _read_text(path)
+
+        use_chunks = needs_chunking(text) if chunked is None else chunked
+        sections = split_sections(text) if use_chunks else [text]
+
+        custom_ids = []
+        for number, section in enumerate(sections):
+            custom_id = f"u{index:05d}" if len(sections) == 1 else f"u{index:05d}-s{number:03d}"
+            custom_ids.append(custom_id)
+            lines.append({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": batch_request_body(build_prompt(section)),
+            })
+
+        updates.append({
+            "path": path,
+            "sha256": _sha256(text),
+            "period": period,
+            "custom_ids": custom_ids,
+        })
+
+    return updates, lines
+
+
+def write_requests(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+
+
+def read_requests(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# -----------------------------
+# Checkpoint
+# -----------------------------
+
+def _write_json(path, data):
+    """Write-to-temp + atomic rename: a crash never leaves a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(work_dir):
+    path = os.path.join(work_dir, "checkpoint.json")
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_checkpoint(work_dir, checkpoint):
+    _write_json(os.path.join(work_dir, "checkpoint.json"), checkpoint)
+
+
+def load_responses(work_dir):
+    """{custom_id: content} received so far (failed requests are absent)."""
+    path = os.path.join(work_dir, "responses.jsonl")
+    responses = {}
+
+    if not os.path.exists(path):
+        return responses
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted run
+            if record["content"] is not None:  # failures logged by older runs
+                responses[record["custom_id"]] = record["content"]
+
+    return responses
+
+
+class ResponseLog:
+    """Append-only responses.jsonl; one durable line per usable response."""
+
+    def __init__(self, work_dir):
+        self._file = open(os.path.join(work_dir, "responses.jsonl"), "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def append(self, custom_id, content):
+        line = json.dumps({"custom_id": custom_id, "content": content})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# -----------------------------
+# Batch Executors
+# -----------------------------
+
+class BatchExecutor(ABC):
+    """
+    Runs a batch-request JSONL file.
+
+    submit(requests_path) → batch id (stored in the checkpoint)
+    collect(batch_id, requests_path, done_ids) → yields (custom_id, content)
+        as responses become available, skipping done_ids; content is the
+        raw message content, or None for a failed request
+    """
+
+    name = None
+
+    @abstractmethod
+    def submit(self, requests_path):
+        ...
+
+    @abstractmethod
+    def collect(self, batch_id, requests_path, done_ids):
+        ...
+
+
+class LocalBatchExecutor(BatchExecutor):
+    """
+    Local stand-in for a batch service: every request line is sent as a
+    regular call (llm_service.complete_request) on a thread pool, and
+    responses are yielded in completion order. Nothing runs between
+    submit and collect, so resuming simply runs the missing lines.
+    """
+
+    name = "local"
+
+    def __init__(self, max_workers=None, complete=complete_request):
+        self.max_workers = max_workers or BATCH_MAX_WORKERS
+        self.complete = complete
+
+    def submit(self, requests_path):
+        with open(requests_path, "rb") as f:
+            return "local-" + hashlib.sha256(f.read()).hexdigest()[:16]
+
+    def collect(self, batch_id, requests_path, done_ids):
+        if self.complete is complete_request and get_client() is None:
+            raise RuntimeError("OPENAI_API_KEY is required for the local batch executor")
+
+        pending = [
+            line for line in read_requests(requests_path)
+            if line["custom_id"] not in done_ids
+        ]
+        if not pending:
+            return
+
+        workers = max(1, min(self.max_workers, len(pending)))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(contextvars.copy_context().run, self.complete, line["body"]):
+                    line["custom_id"]
+                for line in pending
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+class OpenAIBatchExecutor(BatchExecutor):
+    """
+    OpenAI Batch API: uploads the requests file, creates a batch and polls
+    it until it ends. The batch lives server-side, so a resumed run picks
+    up the same batch id instead of submitting again.
+    """
+
+    name = "openai"
+
+    TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, poll_interval=None, client=None):
+        self.poll_interval = BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        self._client = client
+
+    @property
+    def client(self):
+        client = self._client or get_client()
+        if client is None:
+            raise RuntimeError("OPENAI_API_KEY is required for the openai batch executor")
+        return client
+
+    def submit(self, requests_path):
+        with open(requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def collect(self, batch_id, requests_path, done_ids):
+        batch = self.client.batches.retrieve(batch_id)
+        while batch.status not in self.TERMINAL:
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch_id)
+
+        seen = set(done_ids)
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                custom_id = record["custom_id"]
+                if custom_id in seen:
+                    continue
+                seen.add(custom_id)
+
+                yield custom_id, self._content(record)
+
+        # Lines the batch never answered (failed / expired batch)
+        for line in read_requests(requests_path):
+            if line["custom_id"] not in seen:
+                yield line["custom_id"], None
+
+    @staticmethod
+    def _content(record):
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            return None
+
+        try:
+            return response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            return None
+
+
+EXECUTORS = {
+    LocalBatchExecutor.name: LocalBatchExecutor,
+    OpenAIBatchExecutor.name: OpenAIBatchExecutor,
+}
+
+
+def get_executor(executor, **options):
+    """Executor instance from a registered name (instances pass through)."""
+    if isinstance(executor, BatchExecutor):
+        return executor
+
+    try:
+        return EXECUTORS[executor](**options)
+    except KeyError:
+        raise ValueError(
+            f"Unknown batch executor: {executor} (expected one of {', '.join(EXECUTORS)})"
+        ) from None
+
+
+# -----------------------------
+# Ordered Application
+# -----------------------------
+
+def _usable_content(content, client):
+    """
+    Validated (and repaired) response content as JSON text, or None if
+    the request failed or its answer is unusable.
+    """
+    if content is None:
+        return None
+
+    result = validate_response(content, client)
+    return json.dumps(result) if result is not None else None
+
+
+def _analyzed_update(update, responses):
+    """Post-processed result of one update from its validated responses."""
+    raws = [json.loads(responses[custom_id]) for custom_id in update["custom_ids"]]
+    raw = raws[0] if len(raws) == 1 else merge_chunk_results(raws)
+
+    return post_process_result(raw, _read_text(update["path"]))
+
+
+def _apply_range(work_dir, checkpoint, responses, start, end, project_id):
+    """
+    Applies updates[start:end] to memory and the comparison state.
+
+    The range is recorded in the checkpoint before memory is written, so
+    a run interrupted between the memory write and the checkpoint does
+    not apply the same periods twice on resume. A range that would land
+    before memory's last period raises ValueError instead.
+    """
+    updates = checkpoint["updates"][start:end]
+    batch = [
+        (_analyzed_update(update, responses), update["period"])
+        for update in updates
+    ]
+
+    last_period = load_memory(project_id).get("last_updated_period")
+    resumed = (
+        checkpoint.get("applying") == [start, end]
+        and last_period == updates[-1]["period"]
+    )
+    if not resumed:
+        check_period_order(project_id, last_period, updates[0]["period"])
+
+    checkpoint["applying"] = [start, end]
+    save_checkpoint(work_dir, checkpoint)
+
+    if not resumed:
+        record_updates(batch, project_id=project_id)
+    else:
+        # Interrupted after the memory write: finish the comparison only
+        # (already-folded periods are skipped by the accumulator)
+        record_comparison(batch, project_id=project_id)
+
+    checkpoint["applied"] = end
+    checkpoint.pop("applying", None)
+    save_checkpoint(work_dir, checkpoint)
+
+
+def _ready_until(checkpoint, responses):
+    """End of the run of consecutive updates whose responses are all in."""
+    end = checkpoint["applied"]
+    updates = checkpoint["updates"]
+
+    while end < len(updates) and all(
+        custom_id in responses for custom_id in updates[end]["custom_ids"]
+    ):
+        end += 1
+
+    return end
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+
+def ingest_directory(input_dir, project_id=DEFAULT_PROJECT_ID, work_dir=None,
+                     executor="local", start_period=None, chunked=None,
+                     pattern="*.txt", restart=False, progress=None, **executor_options):
+    """
+    Ingests every update of input_dir into a project's memory through a
+    batch executor (name or BatchExecutor instance).
+
+    Resumes from the work directory's checkpoint when one exists for the
+    same files; restart=True discards it. progress(message) is called
+    with one line per step. Returns a summary dict.
+    """
+    say = progress or (lambda message: None)
+    # Same id the sidebar uses ("Alpha Team" → alpha_team)
+    project_id = normalize_project_id(project_id)
+    work_dir = work_dir or work_dir_path(project_id)
+    executor = get_executor(executor, **executor_options)
+
+    if restart and os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir, exist_ok=True)
+
+    requests_path = os.path.join(work_dir, "requests.jsonl")
+
+    paths = discover_updates(input_dir, pattern)
+    if not paths:
+        raise ValueError(f"No updates matching {pattern} in {input_dir}")
+
+    periods = assign_periods(paths, start_period)
+    checkpoint = load_checkpoint(work_dir)
+
+    if checkpoint is None:
+        check_period_order(
+            project_id, load_memory(project_id).get("last_updated_period"), periods[0]
+        )
+
+        updates, lines = plan_batch(paths, periods, chunked)
+        write_requests(requests_path, lines)
+
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "project_id": project_id,
+            "input_dir": input_dir,
+            "executor": executor.name,
+            "batch_id": None,
+            "updates": updates,
+            "applied": 0,
+        }
+        save_checkpoint(work_dir, checkpoint)
+        say(f"Planned {len(updates)} updates as {len(lines)} batch requests")
+
+    else:
+        recorded = [(u["path"], u["sha256"]) for u in checkpoint["updates"]]
+        current = [(path, _sha256(_read_text(path))) for path in paths]
+        if recorded != current or checkpoint["project_id"] != project_id:
+            raise ValueError(
+                f"{work_dir} holds a checkpoint for different updates; "
+                "rerun with restart=True (--restart) to discard it"
+            )
+        say(f"Resuming: {checkpoint['applied']}/{len(paths)} updates already applied")
+
+    responses = load_responses(work_dir)
+
+    if checkpoint["batch_id"] is None:
+        submit_path = requests_path
+        if responses:
+            # Retry after failures: resubmit only the unanswered requests
+            submit_path = os.path.join(work_dir, "requests.retry.jsonl")
+            write_requests(submit_path, [
+                line for line in read_requests(requests_path)
+                if line["custom_id"] not in responses
+            ])
+
+        checkpoint["batch_id"] = executor.submit(submit_path)
+        save_checkpoint(work_dir, checkpoint)
+        say(f"Submitted batch {checkpoint['batch_id']} ({executor.name})")
+
+    client = get_client()
+    total = len(checkpoint["updates"])
+    failed = []
+
+    with request_context() as request_id:
+        # Finish a range interrupted between memory write and checkpoint
+        if "applying" in checkpoint:
+            start, end = checkpoint["applying"]
+            _apply_range(work_dir, checkpoint, responses, start, end, project_id)
+
+        def apply_ready():
+            start = checkpoint["applied"]
+            end = _ready_until(checkpoint, responses)
+            if end <= start:
+                return
+
+            _apply_range(work_dir, checkpoint, responses, start, end, project_id)
+            say(f"Applied {end}/{total} updates (through {checkpoint['updates'][end - 1]['period']})")
+
+        apply_ready()
+
+        log = ResponseLog(work_dir)
+        try:
+            for custom_id, content in executor.collect(
+                checkpoint["batch_id"], requests_path, set(responses)
+            ):
+                content = _usable_content(content, client)
+                if content is None:
+                    failed.append(custom_id)  # not recorded: retried on rerun
+                    continue
+
+                log.append(custom_id, content)
+                responses[custom_id] = content
+                apply_ready()
+        finally:
+            log.close()
+
+    if failed:
+        # The next run submits a new batch for the failed requests
+        checkpoint["batch_id"] = None
+        save_checkpoint(work_dir, checkpoint)
+
+    applied = checkpoint["applied"]
+    if applied < total:
+        missing = [
+            u["path"] for u in checkpoint["updates"][applied:]
+            if not all(c in responses for c in u["custom_ids"])
+        ]
+        raise RuntimeError(
+            f"Batch ended with {len(missing)} updates unanswered or unusable "
+            f"({len(failed)} failed requests; first update: {missing[0]}); "
+            f"applied through update {applied}/{total}, rerun to retry the rest"
+        )
+
+    return {
+        "project_id": project_id,
+        "batch_id": checkpoint["batch_id"],
+        "request_id": request_id,
+        "updates": total,
+        "requests": sum(len(u["custom_ids"]) for u in checkpoint["updates"]),
+        "failed_requests": len(failed),
+        "periods": [checkpoint["updates"][0]["period"], checkpoint["updates"][-1]["period"]],
+    }
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk-ingest a directory of stakeholder updates through a batch executor."
+    )
+    parser.add_argument("input_dir")
+    parser.add_argument("--project", default=DEFAULT_PROJECT_ID)
+    parser.add_argument("--work-dir", help="checkpoint directory (default batches/<project>)")
+    parser.add_argument("--executor", choices=sorted(EXECUTORS), default="local")
+    parser.add_argument("--start-period", help="ISO week of the first update, e.g. 2025-W01")
+    parser.add_argument("--pattern", default="*.txt")
+    parser.add_argument("--chunking", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--max-workers", type=int, help="local executor concurrency")
+    parser.add_argument("--poll-interval", type=float, help="openai executor poll interval (s)")
+    parser.add_argument("--restart", action="store_true", help="discard an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.executor == "local" and args.max_workers:
+        options["max_workers"] = args.max_workers
+    if args.executor == "openai" and args.poll_interval is not None:
+        options["poll_interval"] = args.poll_interval
+
+    try:
+        summary = ingest_directory(
+            args.input_dir,
+            project_id=args.project,
+            work_dir=args.work_dir,
+            executor=args.executor,
+            start_period=args.start_period,
+            chunked={"auto": None, "on": True, "off": False}[args.chunking],
+            pattern=args.pattern,
+            restart=args.restart,
+            progress=print,
+            **options
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+cache_service.py
+
+Disk-backed, content-addressed cache for LLM responses.
+Entries are keyed on a hash of prompt + model + temperature + endpoint
++ response format (plus CACHE_KEY_VERSION) and evicted
+least-recently-used once they exceed the age or size budget.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+CACHE_DIR = os.path.join("cache", "llm")
+
+CACHE_MAX_ENTRIES = int(os.getenv("GPMOID_LLM_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("GPMOID_LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+CACHE_MAX_AGE_SECONDS = int(os.getenv("GPMOID_LLM_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+# Bump when the key payload or the cached response shape changes
+CACHE_KEY_VERSION = 2
+
+# Writes between directory scans while the running estimate stays under
+# budget (picks up expired entries and other processes' writes)
+CACHE_SCAN_EVERY = 64
+
+# Over budget, eviction goes down to this fraction of it, so a full
+# cache is not rescanned on every write
+CACHE_LOW_WATER = 0.9
+
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+_lock = threading.Lock()
+
+# Running estimate of the cache directory since the last scan
+# (entries None → not scanned yet)
+_usage = {"entries": None, "bytes": 0, "writes": 0}
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def cache_enabled():
+    """Global bypass switch (GPMOID_LLM_CACHE=off disables the cache)."""
+    return os.getenv("GPMOID_LLM_CACHE", "on").strip().lower() not in (
+        "0", "off", "false", "no"
+    )
+
+
+def cache_key(
+    prompt: str,
+    model: str,
+    temperature: float,
+    base_url=None,
+    response_format=None
+) -> str:
+    payload = json.dumps(
+        {
+            "version": CACHE_KEY_VERSION,
+            "prompt": prompt,
+            "model": model,
+            "temperature": temperature,
+            "base_url": base_url,
+            "response_format": response_format,
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _count(stat, n=1):
+    with _lock:
+        _stats[stat] += n
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# -----------------------------
+# Get / Put
+# -----------------------------
+
+def get_cached(key):
+    """
+    Returns the cached response for key, or None on miss.
+    A hit refreshes the entry's recency for LRU eviction.
+    """
+    path = _entry_path(key)
+
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        _count("misses")
+        return None
+
+    if age > CACHE_MAX_AGE_SECONDS:
+        _remove(path)
+        _count("misses")
+        return None
+
+    try:
+        with open(path, "r") as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        _remove(path)
+        _count("misses")
+        return None
+
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+    _count("hits")
+    return value
+
+
+def put_cached(key, value):
+    if not os.path.exists(CACHE_DIR):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    data = json.dumps(value)
+
+    with open(tmp_path, "w") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    _count("writes")
+    if _needs_scan(len(data.encode("utf-8"))):
+        _evict()
+
+
+# -----------------------------
+# Eviction
+# -----------------------------
+
+def _needs_scan(size):
+    """
+    Adds one written entry to the running estimate; True when the cache
+    directory should be scanned (over budget, or every CACHE_SCAN_EVERY
+    writes). Overwrites are counted as new entries, which only brings
+    the next scan forward.
+    """
+    with _lock:
+        if _usage["entries"] is None:
+            return True
+
+        _usage["entries"] += 1
+        _usage["bytes"] += size
+        _usage["writes"] += 1
+
+        return (
+            _usage["entries"] > CACHE_MAX_ENTRIES
+            or _usage["bytes"] > CACHE_MAX_BYTES
+            or _usage["writes"] >= CACHE_SCAN_EVERY
+        )
+
+
+def _evict():
+    now = time.time()
+    entries = []
+
+    for entry in os.scandir(CACHE_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, entry.path))
+
+    # Oldest (least recently used) first
+    entries.sort()
+
+    total_bytes = sum(size for _, size, _ in entries)
+    remaining = len(entries)
+    evicted = 0
+
+    max_entries, max_bytes = CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+    if remaining > max_entries or total_bytes > max_bytes:
+        max_entries = int(max_entries * CACHE_LOW_WATER)
+        max_bytes = int(max_bytes * CACHE_LOW_WATER)
+
+    for mtime, size, path in entries:
+        expired = now - mtime > CACHE_MAX_AGE_SECONDS
+        over_budget = remaining > max_entries or total_bytes > max_bytes
+
+        if not expired and not over_budget:
+            break
+
+        _remove(path)
+        remaining -= 1
+        total_bytes -= size
+        evicted += 1
+
+    if evicted:
+        _count("evictions", evicted)
+
+    with _lock:
+        _usage.update(entries=remaining, bytes=total_bytes, writes=0)
+
+
+# -----------------------------
+# Utilities
+# -----------------------------
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _lock:
+        for stat in _stats:
+            _stats[stat] = 0
+
+
+def clear_cache():
+    with _lock:
+        _usage.update(entries=None, bytes=0, writes=0)
+
+    if not os.path.exists(CACHE_DIR):
+        return
+    for entry in os.scandir(CACHE_DIR):
+        _remove(entry.path)
@@ -0,0 +1,83 @@
+"""
+chunking.py
+
+Splits long stakeholder reports into sections for map-reduce analysis.
+
+Sections follow the document's own structure: paragraphs (blank-line
+separated) are packed greedily up to CHUNK_MAX_CHARS; a paragraph that
+is longer on its own is split at sentence boundaries, and only as a
+last resort mid-sentence.
+"""
+
+import os
+import re
+
+
+# Texts longer than this are analyzed in sections
+CHUNK_MAX_CHARS = int(os.getenv("GPMOID_CHUNK_MAX_CHARS", "6000"))
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def needs_chunking(text: str, max_chars: int = None) -> bool:
+    return len(text) > (max_chars or CHUNK_MAX_CHARS)
+
+
+def _split_long(paragraph, max_chars):
+    """Sentence-packed pieces of one oversized paragraph."""
+    pieces = []
+    current = ""
+
+    for sentence in _SENTENCE_END.split(paragraph):
+        # Hard cut for a single sentence beyond the budget
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        pieces.append(current)
+
+    return pieces
+
+
+def split_sections(text: str, max_chars: int = None):
+    """
+    Returns the text as a list of sections of at most max_chars
+    (default CHUNK_MAX_CHARS), in document order.
+    """
+    max_chars = max_chars or CHUNK_MAX_CHARS
+
+    paragraphs = []
+    for paragraph in _PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > max_chars:
+            paragraphs.extend(_split_long(paragraph, max_chars))
+        else:
+            paragraphs.append(paragraph)
+
+    sections = []
+    current = ""
+
+    for paragraph in paragraphs:
+        if current and len(current) + 2 + len(paragraph) > max_chars:
+            sections.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        sections.append(current)
+
+    return sections
@@ -2,32 +2,39 @@
 comparison_service.py
 
 Implements v2 multi-update comparison logic for GPMOID.
-Deterministic, stateless, PMO-aligned.
+Deterministic and PMO-aligned; compare_updates is a pure function of its
+inputs.
+
+Heat trends, snapshot maxima and the comparison table are computed on a
+columnar risks × updates matrix (services.heat_matrix). numpy is loaded
+with it on the first comparison, not when the pages import this module.
+
+ComparisonAccumulator is the incremental counterpart: it folds in one
+analyzed update at a time, and its state is stored on disk next to the
+project's memory (memory/comparison_<id>.json). record_comparison and
+load_comparison write and read that state; analysis_service.record_updates
+keeps it in step with memory.
 """
 
-from collections import defaultdict
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict
+
+from services.risk_classifier import risk_id_for
+from services.metrics import span
+from services.memory_service import (
+    DEFAULT_PROJECT_ID,
+    load_comparison_state,
+    normalize_period,
+    update_comparison_state,
+)
+
+if TYPE_CHECKING:
+    from services.heat_matrix import HeatMatrix
 
 
 # -----------------------------
 # Helpers
 # -----------------------------
 
-def derive_risk_id(description: str, category: str) -> str:
-    text = f"{category} {description}".lower()
-
-    if "vendor" in text or "external" in text:
-        return "vendor_dependency"
-    if "team" in text or "morale" in text or "capacity" in text:
-        return "team_capacity"
-    if "cost" in text or "budget" in text:
-        return "cost_overrun"
-    if "quality" in text:
-        return "quality_risk"
-
-    return category.lower().replace(" ", "_")
-
-
 def heat_rank(heat: str) -> int:
     return {"Low": 1, "Medium": 2, "High": 3}.get(heat, 0)
 
@@ -40,9 +47,7 @@ def normalize_risks(analyzed_update: Dict) -> Dict:
     normalized = {}
 
     for risk in analyzed_update.get("risks", []):
-        risk_id = derive_risk_id(
-            risk["description"], risk["category"]
-        )
+        risk_id = risk_id_for(risk)
 
         normalized[risk_id] = {
             "display_name": risk["description"],
@@ -60,34 +65,34 @@ def normalize_risks(analyzed_update: Dict) -> Dict:
 # Snapshot Comparison
 # -----------------------------
 
-def build_snapshot_comparison(previous: Dict, current: Dict) -> Dict:
-    def highest_heat(risks: Dict) -> str:
-        if not risks:
-            return "Low"
-        return max(
-            (r["risk_heat"] for r in risks.values()),
-            key=heat_rank
-        )
-
-    def top_risk(risks: Dict) -> str:
-        if not risks:
-            return "None"
-        return max(
-            risks.values(),
-            key=lambda r: heat_rank(r["risk_heat"])
-        )["display_name"]
+def build_snapshot_comparison(previous: Dict, current: Dict,
+                              matrix: "HeatMatrix" = None) -> Dict:
+    """
+    previous / current: {"risks": normalized risks, "escalation_summary": ...}
+    matrix: heat matrix whose last two columns are these updates
+    (built from them if omitted).
+    """
+    from services.heat_matrix import HeatMatrix, HEAT_LABELS
+
+    if matrix is None:
+        matrix = HeatMatrix.from_normalized([previous["risks"], current["risks"]])
+
+    maxima = matrix.snapshot_max()
+
+    def side(update: Dict, col: int) -> Dict:
+        risk_id = matrix.top_risk(col)
+        return {
+            "escalation": bool(update.get("escalation_summary")),
+            "highest_risk_heat": HEAT_LABELS[maxima[col]] or "Low",
+            "top_risk": (
+                update["risks"][risk_id]["display_name"]
+                if risk_id is not None else "None"
+            ),
+        }
 
     return {
-        "previous": {
-            "escalation": bool(previous.get("escalation_summary")),
-            "highest_risk_heat": highest_heat(previous["risks"]),
-            "top_risk": top_risk(previous["risks"]),
-        },
-        "current": {
-            "escalation": bool(current.get("escalation_summary")),
-            "highest_risk_heat": highest_heat(current["risks"]),
-            "top_risk": top_risk(current["risks"]),
-        },
+        "previous": side(previous, -2),
+        "current": side(current, -1),
     }
 
 
@@ -135,26 +140,24 @@ def detect_changes(previous: Dict, current: Dict) -> Dict:
 # Trend Escalation
 # -----------------------------
 
-def detect_trend_escalations(risk_history: Dict) -> List[str]:
-    escalations = []
+def trend_escalations(matrix: "HeatMatrix") -> List[str]:
+    """Worsening and persistent-high risks, in first-appearance order."""
+    worsening = matrix.worsening()
+    persistent = matrix.persistent_high()
 
-    for risk_id, states in risk_history.items():
-        if len(states) < 2:
-            continue
+    escalations = []
 
-        heats = [heat_rank(s["risk_heat"]) for s in states]
-        name = states[-1]["display_name"]
+    for row in (worsening | persistent).nonzero()[0]:
+        name = matrix.names[row]
 
         # Worsening trend
-        if len(heats) >= 3:
-            if heats[-1] > heats[-2] >= heats[-3]:
-                escalations.append(
-                    f"{name} shows a worsening risk trend across updates"
-                )
-                continue
+        if worsening[row]:
+            escalations.append(
+                f"{name} shows a worsening risk trend across updates"
+            )
 
         # Persistent high risk
-        if heats[-1] == 3 and heats[-2] == 3:
+        else:
             escalations.append(
                 f"{name} remains at high risk across multiple updates"
             )
@@ -162,37 +165,50 @@ def detect_trend_escalations(risk_history: Dict) -> List[str]:
     return escalations
 
 
+def detect_trend_escalations(risk_history: Dict) -> List[str]:
+    """
+    risk_history: {risk_id: [normalized risk, ...]} in observation order.
+    """
+    depth = max((len(states) for states in risk_history.values()), default=0)
+
+    steps = [
+        {
+            risk_id: states[i]
+            for risk_id, states in risk_history.items()
+            if len(states) > i
+        }
+        for i in range(depth)
+    ]
+
+    from services.heat_matrix import HeatMatrix
+
+    return trend_escalations(HeatMatrix.from_normalized(steps))
+
+
 # -----------------------------
 # Risk Comparison Table
 # -----------------------------
 
 def build_risk_comparison_table(
-    normalized_updates: List[Dict]
+    normalized_updates: List[Dict],
+    matrix: "HeatMatrix" = None
 ) -> List[Dict]:
-    table = defaultdict(dict)
+    from services.heat_matrix import HeatMatrix, HEAT_LABELS
+
+    if matrix is None:
+        matrix = HeatMatrix.from_normalized(normalized_updates)
 
-    for idx, update in enumerate(normalized_updates):
-        label = f"U{idx + 1}"
-        for risk_id, risk in update.items():
-            table[risk_id]["risk"] = risk["display_name"]
-            table[risk_id][label] = risk["risk_heat"]
+    labels = [f"U{idx + 1}" for idx in range(matrix.shape[1])]
+    trends = matrix.trend_labels()
 
     rows = []
-    for risk_id, values in table.items():
-        heats = [
-            heat_rank(v)
-            for k, v in values.items()
-            if k.startswith("U")
-        ]
+    for row, name in enumerate(matrix.names):
+        values = {"risk": name}
 
-        if heats[-1] > heats[0]:
-            trend = "Up"
-        elif heats[-1] < heats[0]:
-            trend = "Down"
-        else:
-            trend = "Stable"
+        for col in matrix.present[row].nonzero()[0]:
+            values[labels[col]] = HEAT_LABELS[matrix.ranks[row, col]]
 
-        values["trend"] = trend
+        values["trend"] = trends[row]
         rows.append(values)
 
     return rows
@@ -245,40 +261,245 @@ def generate_leadership_summary(
 # Main Entry Point
 # -----------------------------
 
-def compare_updates(analyzed_updates: List[Dict]) -> Dict:
+def compare_updates(analyzed_updates: List[Dict], project_id: str = None) -> Dict:
     if len(analyzed_updates) < 2:
         raise ValueError("At least two analyzed updates are required")
 
-    normalized = [
-        normalize_risks(update) for update in analyzed_updates
-    ]
+    from services.heat_matrix import HeatMatrix
+
+    with span("comparison"):
+        normalized = [
+            normalize_risks(update) for update in analyzed_updates
+        ]
 
-    snapshot = build_snapshot_comparison(
-        {"risks": normalized[-2], "escalation_summary": analyzed_updates[-2].get("escalation_summary")},
-        {"risks": normalized[-1], "escalation_summary": analyzed_updates[-1].get("escalation_summary")},
-    )
+        # One columnar pass feeds snapshot, trends and the table
+        matrix = HeatMatrix.from_normalized(normalized)
 
-    change_summary = detect_changes(
-        normalized[-2], normalized[-1]
-    )
+        snapshot = build_snapshot_comparison(
+            {"risks": normalized[-2], "escalation_summary": analyzed_updates[-2].get("escalation_summary")},
+            {"risks": normalized[-1], "escalation_summary": analyzed_updates[-1].get("escalation_summary")},
+            matrix=matrix,
+        )
 
-    risk_history = defaultdict(list)
-    for update in normalized:
-        for risk_id, risk in update.items():
-            risk_history[risk_id].append(risk)
+        change_summary = detect_changes(
+            normalized[-2], normalized[-1]
+        )
 
-    trend_escalation = detect_trend_escalations(risk_history)
+        trend_escalation = trend_escalations(matrix)
 
-    risk_table = build_risk_comparison_table(normalized)
+        risk_table = build_risk_comparison_table(normalized, matrix=matrix)
 
-    leadership_summary = generate_leadership_summary(
-        change_summary, trend_escalation
-    )
+        leadership_summary = generate_leadership_summary(
+            change_summary, trend_escalation
+        )
 
     return {
+        "project_id": project_id,
         "snapshot": snapshot,
         "change_summary": change_summary,
         "trend_escalation": trend_escalation,
         "risk_comparison_table": risk_table,
         "leadership_summary": leadership_summary,
     }
+
+
+# -----------------------------
+# Incremental Comparison
+# -----------------------------
+
+COMPARISON_STATE_VERSION = 1
+
+TREND_BY_SIGN = {-1: "Down", 0: "Stable", 1: "Up"}
+
+
+class ComparisonAccumulator:
+    """
+    Stateful compare_updates: add() folds in one analyzed update in time
+    proportional to its risks (and the previous update's, for change
+    detection) instead of recomputing from the full list.
+
+    The state is a JSON-safe dict (to_dict / from_dict):
+    - "updates": number of updates folded in
+    - "periods": periods folded in (one update per period, first wins)
+    - "previous" / "last": normalized risks of the last two updates
+    - "risks": per risk_id, in first-appearance order:
+        "index", "first" heat rank, "recent" ranks (last 3) and the
+        comparison table "row"
+    - "escalations": risk_id → current trend escalation line
+    """
+
+    def __init__(self, state=None, project_id=None):
+        self.state = state or {
+            "version": COMPARISON_STATE_VERSION,
+            "project_id": project_id,
+            "updates": 0,
+            "periods": [],
+            "previous": None,
+            "last": None,
+            "risks": {},
+            "escalations": {},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state)
+
+    def to_dict(self):
+        return self.state
+
+    def add(self, analyzed_update: Dict, period_id: str = None):
+        """
+        Folds in one analyzed update. Returns the delta for this update
+        (snapshot, change summary, trend escalations, leadership summary
+        and the changed table rows), or None for an already folded period.
+        Snapshot, change summary and leadership summary are None for the
+        first update.
+        """
+        state = self.state
+
+        if period_id is not None:
+            if period_id in state["periods"]:
+                return None
+            state["periods"].append(period_id)
+
+        state["updates"] += 1
+        label = f"U{state['updates']}"
+
+        current = {
+            "risks": normalize_risks(analyzed_update),
+            "escalation_summary": bool(analyzed_update.get("escalation_summary")),
+        }
+
+        table_delta = []
+        for risk_id, risk in current["risks"].items():
+            table_delta.append(self._fold_risk(risk_id, risk, label))
+
+        previous = state["last"]
+        state["previous"], state["last"] = previous, current
+
+        delta = {
+            "update": state["updates"],
+            "label": label,
+            "snapshot": None,
+            "change_summary": None,
+            "trend_escalation": self.trend_escalations(),
+            "leadership_summary": None,
+            "table_delta": table_delta,
+        }
+
+        if previous is not None:
+            delta["snapshot"] = build_snapshot_comparison(previous, current)
+            delta["change_summary"] = detect_changes(
+                previous["risks"], current["risks"]
+            )
+            delta["leadership_summary"] = generate_leadership_summary(
+                delta["change_summary"], delta["trend_escalation"]
+            )
+
+        return delta
+
+    def _fold_risk(self, risk_id, risk, label):
+        risks = self.state["risks"]
+        rank = heat_rank(risk["risk_heat"])
+
+        entry = risks.get(risk_id)
+        if entry is None:
+            entry = risks[risk_id] = {
+                "index": len(risks),
+                "first": rank,
+                "recent": [],
+                "row": {},
+            }
+
+        entry["recent"] = (entry["recent"] + [rank])[-3:]
+
+        row = entry["row"]
+        row.pop("trend", None)
+        row["risk"] = risk["display_name"]
+        row[label] = risk["risk_heat"]
+        row["trend"] = TREND_BY_SIGN[(rank > entry["first"]) - (rank < entry["first"])]
+
+        self._update_escalation(risk_id, entry["recent"], risk["display_name"])
+
+        return dict(row)
+
+    def _update_escalation(self, risk_id, heats, name):
+        escalations = self.state["escalations"]
+        escalations.pop(risk_id, None)
+
+        # Worsening trend
+        if len(heats) >= 3 and heats[-1] > heats[-2] >= heats[-3]:
+            escalations[risk_id] = (
+                f"{name} shows a worsening risk trend across updates"
+            )
+
+        # Persistent high risk
+        elif len(heats) >= 2 and heats[-1] == 3 and heats[-2] == 3:
+            escalations[risk_id] = (
+                f"{name} remains at high risk across multiple updates"
+            )
+
+    def trend_escalations(self) -> List[str]:
+        risks = self.state["risks"]
+        escalations = self.state["escalations"]
+
+        return [
+            escalations[risk_id]
+            for risk_id in sorted(escalations, key=lambda r: risks[r]["index"])
+        ]
+
+    def comparison(self) -> Dict:
+        """Full comparison, identical to compare_updates over all folded updates."""
+        state = self.state
+        if state["updates"] < 2:
+            raise ValueError("At least two analyzed updates are required")
+
+        previous, last = state["previous"], state["last"]
+
+        change_summary = detect_changes(previous["risks"], last["risks"])
+        trend_escalation = self.trend_escalations()
+
+        return {
+            "project_id": state["project_id"],
+            "snapshot": build_snapshot_comparison(previous, last),
+            "change_summary": change_summary,
+            "trend_escalation": trend_escalation,
+            "risk_comparison_table": [
+                dict(entry["row"]) for entry in state["risks"].values()
+            ],
+            "leadership_summary": generate_leadership_summary(
+                change_summary, trend_escalation
+            ),
+        }
+
+
+def record_comparison(results_with_periods, project_id=DEFAULT_PROJECT_ID):
+    """
+    Folds analyzed updates ((result, period_id) pairs, in period order)
+    into the project's stored comparison state.
+    Returns the per-update deltas (None for already folded periods).
+    """
+    def apply_changes(state):
+        with span("comparison", incremental=True):
+            accumulator = ComparisonAccumulator(state, project_id=project_id)
+            deltas = [
+                accumulator.add(result, normalize_period(period_id))
+                for result, period_id in results_with_periods
+            ]
+        return accumulator.to_dict(), deltas
+
+    return update_comparison_state(project_id, apply_changes)
+
+
+def load_comparison(project_id=DEFAULT_PROJECT_ID):
+    """
+    (comparison, periods) over every update recorded for the project,
+    read from the stored state instead of recomputed; None before the
+    second recorded update.
+    """
+    state = load_comparison_state(project_id)
+    if state is None or state["updates"] < 2:
+        return None
+
+    accumulator = ComparisonAccumulator.from_dict(state)
+    return accumulator.comparison(), list(state["periods"])
@@ -0,0 +1,63 @@
+"""
+file_lock.py
+
+Advisory inter-process file locks for shared memory storage.
+POSIX flock on a sidecar .lock file, made re-entrant within a process.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: in-process locking only
+    fcntl = None
+
+
+_entries = {}
+_entries_guard = threading.Lock()
+
+
+def _entry(path):
+    path = os.path.abspath(path)
+    with _entries_guard:
+        if path not in _entries:
+            _entries[path] = {"rlock": threading.RLock(), "depth": 0, "file": None}
+        return _entries[path]
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock on path (created if missing), held for the block.
+
+    Threads in this process serialize on an RLock; the flock is taken on
+    first entry, so nested use by the same thread does not deadlock.
+    Without fcntl, other processes are not excluded and callers rely on
+    their optimistic revision checks.
+    """
+    entry = _entry(path)
+
+    with entry["rlock"]:
+        if entry["depth"] == 0:
+            lock_dir = os.path.dirname(path)
+            if lock_dir and not os.path.exists(lock_dir):
+                os.makedirs(lock_dir, exist_ok=True)
+
+            f = open(path, "a")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            entry["file"] = f
+
+        entry["depth"] += 1
+        try:
+            yield
+        finally:
+            entry["depth"] -= 1
+            if entry["depth"] == 0:
+                f = entry["file"]
+                entry["file"] = None
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                f.close()
@@ -0,0 +1,163 @@
+"""
+heat_matrix.py
+
+Columnar heat engine for multi-update comparison.
+
+Heat ranks are held in a risks × periods NumPy matrix with a presence
+mask (a risk absent from an update is missing, not "Low"). Trend
+direction, worsening / persistent-high detection and snapshot maxima
+are array operations over that matrix, so long horizons (100+ periods)
+across thousands of risks stay interactive.
+
+Rows are ordered by first appearance, matching the dict-based outputs
+of comparison_service.
+"""
+
+import numpy as np
+
+
+HEAT_RANKS = {"Low": 1, "Medium": 2, "High": 3}
+HEAT_LABELS = np.array(["", "Low", "Medium", "High"], dtype=object)
+HIGH = HEAT_RANKS["High"]
+
+TREND_LABELS = np.array(["Down", "Stable", "Up"], dtype=object)
+
+
+class HeatMatrix:
+    """
+    ranks:   int8  [risks, periods]  heat rank (0 where missing)
+    present: bool  [risks, periods]  risk observed in that update
+    order:   int32 [risks, periods]  position of the risk within its update
+    """
+
+    def __init__(self, risk_ids, names, ranks, present, order):
+        self.risk_ids = risk_ids
+        self.names = names  # display name at each risk's last observation
+        self.ranks = ranks
+        self.present = present
+        self.order = order
+
+    @property
+    def shape(self):
+        return self.ranks.shape
+
+    @classmethod
+    def from_normalized(cls, normalized_updates):
+        """
+        Builds the matrix from comparison_service.normalize_risks outputs
+        ({risk_id: risk} per update, in period order).
+        """
+        normalized_updates = list(normalized_updates)
+
+        # First-appearance order, latest display name
+        names_by_id = {}
+        for update in normalized_updates:
+            names_by_id.update(
+                (risk_id, risk["display_name"]) for risk_id, risk in update.items()
+            )
+
+        row_of = {risk_id: row for row, risk_id in enumerate(names_by_id)}
+        shape = (len(row_of), len(normalized_updates))
+
+        ranks = np.zeros(shape, dtype=np.int8)
+        present = np.zeros(shape, dtype=bool)
+        order = np.zeros(shape, dtype=np.int32)
+
+        for col, update in enumerate(normalized_updates):
+            if not update:
+                continue
+
+            rows = np.fromiter(
+                (row_of[risk_id] for risk_id in update),
+                dtype=np.intp,
+                count=len(update)
+            )
+            ranks[rows, col] = np.fromiter(
+                (HEAT_RANKS.get(risk["risk_heat"], 0) for risk in update.values()),
+                dtype=np.int8,
+                count=len(update)
+            )
+            present[rows, col] = True
+            order[rows, col] = np.arange(len(update))
+
+        return cls(list(row_of), list(names_by_id.values()), ranks, present, order)
+
+    # -----------------------------
+    # Observation Indexing
+    # -----------------------------
+
+    def observation_counts(self):
+        return self.present.sum(axis=1)
+
+    def nth_last_ranks(self, n):
+        """
+        Rank at each risk's n-th most recent observation (n=1 → latest).
+        Returns (ranks, valid) where valid marks risks observed ≥ n times.
+        """
+        counts = self.observation_counts()
+        if not self.ranks.shape[1]:
+            return np.zeros_like(counts, dtype=np.int8), counts >= n
+
+        seen_so_far = np.cumsum(self.present, axis=1)
+
+        target = (seen_so_far == (counts - n + 1)[:, None]) & self.present
+        cols = target.argmax(axis=1)
+
+        rows = np.arange(self.ranks.shape[0])
+        return self.ranks[rows, cols], counts >= n
+
+    def first_ranks(self):
+        """Rank at each risk's first observation."""
+        if not self.ranks.shape[1]:
+            return np.zeros(self.ranks.shape[0], dtype=np.int8)
+
+        cols = self.present.argmax(axis=1)
+        return self.ranks[np.arange(self.ranks.shape[0]), cols]
+
+    # -----------------------------
+    # Trends
+    # -----------------------------
+
+    def trend_direction(self):
+        """Latest vs first observation per risk: -1 down, 0 stable, +1 up."""
+        latest, _ = self.nth_last_ranks(1)
+        return np.sign(latest.astype(np.int16) - self.first_ranks())
+
+    def trend_labels(self):
+        return TREND_LABELS[self.trend_direction() + 1]
+
+    def worsening(self):
+        """Latest observation up on the previous one, which did not drop."""
+        h1, _ = self.nth_last_ranks(1)
+        h2, _ = self.nth_last_ranks(2)
+        h3, valid = self.nth_last_ranks(3)
+        return valid & (h1 > h2) & (h2 >= h3)
+
+    def persistent_high(self):
+        """High at each of the last two observations."""
+        h1, _ = self.nth_last_ranks(1)
+        h2, valid = self.nth_last_ranks(2)
+        return valid & (h1 == HIGH) & (h2 == HIGH)
+
+    # -----------------------------
+    # Snapshots
+    # -----------------------------
+
+    def snapshot_max(self):
+        """Highest heat rank in every update (0 for an update with no risks)."""
+        return np.where(self.present, self.ranks, 0).max(axis=0, initial=0)
+
+    def top_risk(self, col):
+        """
+        risk_id with the highest heat in update col (first listed wins a
+        tie), or None for an update with no risks.
+        """
+        present = self.present[:, col]
+        if not present.any():
+            return None
+
+        ranks = np.where(present, self.ranks[:, col], -1)
+        candidates = ranks == ranks.max()
+        positions = np.where(candidates, self.order[:, col], np.iinfo(np.int32).max)
+
+        return self.risk_ids[int(positions.argmin())]
@@ -0,0 +1,392 @@
+"""
+ingest_cli.py
+
+Headless ingestion of a directory tree of stakeholder updates, for
+scheduled runs without a browser session.
+
+Every directory holding update files (layout of sample_inputs/sample_inputs_1:
+one .txt per week) is one project. Files are processed as a stream:
+
+- LLM I/O runs concurrently on a thread pool
+- the deterministic stages (normalization, risk ids / heat, escalation)
+  run on a process pool (their stage timings are returned to this
+  process and recorded under the run's request id); the multi-update comparison is folded in
+  incrementally as memory is updated (record_updates)
+- memory is updated per project in period order as soon as each run of
+  consecutive updates is complete; periods memory already holds (an
+  earlier run over the same tree) are not applied again
+
+Output per project, under --output (default reports/<project>/):
+
+    analyses.jsonl    one analyzed update per line (file, period, result)
+    comparison.json   the project's comparison, read from its stored
+                      comparison state (two or more updates)
+    comparison.md     the same as a readable report
+    periods.json      file name → period, reused by later runs so the
+                      periods of files without an ISO week in their
+                      name do not move with the calendar
+
+    python -m services.ingest_cli sample_inputs --output reports
+"""
+
+import os
+import sys
+import json
+import argparse
+import contextvars
+import multiprocessing
+from bisect import bisect_right
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from services.analysis_service import (
+    BATCH_MAX_WORKERS,
+    request_analysis,
+    post_process_result,
+    record_updates,
+)
+from services.batch_ingest import assign_periods, discover_updates
+from services.comparison_service import load_comparison
+from services.memory_service import (
+    load_memory,
+    normalize_project_id,
+)
+from services.metrics import capture_spans, record_spans, request_context
+
+
+REPORT_DIR = "reports"
+
+
+# -----------------------------
+# Discovery
+# -----------------------------
+
+def discover_projects(root, pattern="*.txt"):
+    """
+    {project_id: [update paths]} for every directory under root holding
+    update files; the project id is the directory path relative to root
+    (root itself → its own name).
+    """
+    projects = {}
+
+    for directory, subdirs, _ in os.walk(root):
+        subdirs.sort()
+
+        paths = discover_updates(directory, pattern)
+        if not paths:
+            continue
+
+        relative = os.path.relpath(directory, root)
+        name = os.path.basename(os.path.abspath(root)) if relative == "." else relative
+        projects[normalize_project_id(name.replace(os.sep, "_"))] = paths
+
+    return projects
+
+
+# -----------------------------
+# Per-Project Ordering
+# -----------------------------
+
+class ProjectStream:
+    """
+    Results of one project's updates as they complete; applies each run
+    of consecutive finished updates to memory in period order.
+
+    already_applied: leading updates memory holds from an earlier run;
+    they are analyzed for the report but not applied again.
+    """
+
+    def __init__(self, project_id, paths, periods, already_applied=0):
+        self.project_id = project_id
+        self.paths = paths
+        self.periods = periods
+        self.results = [None] * len(paths)
+        self.applied = 0
+        self.already_applied = already_applied
+
+    @property
+    def done(self):
+        return self.applied == len(self.paths)
+
+    def add(self, index, result):
+        self.results[index] = result
+
+    def apply_ready(self):
+        """Applies the ready prefix; returns the number of updates applied."""
+        start = end = self.applied
+        while end < len(self.results) and self.results[end] is not None:
+            end += 1
+
+        if end == start:
+            return 0
+
+        first_new = max(start, self.already_applied)
+        batch = list(zip(self.results[first_new:end], self.periods[first_new:end]))
+        if batch:
+            record_updates(batch, project_id=self.project_id)
+
+        self.applied = end
+        return end - start
+
+
+# -----------------------------
+# Reports
+# -----------------------------
+
+def render_report(project_id, periods, comparison):
+    """Markdown comparison report (periods: one per compared update)."""
+    lines = [
+        f"# Risk comparison: {project_id}",
+        "",
+        f"Periods: {periods[0]} → {periods[-1]} ({len(periods)} updates)",
+        "",
+        "## Leadership summary",
+        "",
+        comparison["leadership_summary"],
+        "",
+        "## Latest vs previous update",
+        "",
+    ]
+
+    for side in ("previous", "current"):
+        snapshot = comparison["snapshot"][side]
+        lines.append(
+            f"- {side.title()}: highest heat {snapshot['highest_risk_heat']}, "
+            f"top risk {snapshot['top_risk']}, "
+            f"escalation {'yes' if snapshot['escalation'] else 'no'}"
+        )
+
+    lines.append("")
+    for kind in ("new", "escalated", "de_escalated"):
+        for item in comparison["change_summary"][kind]:
+            lines.append(f"- {kind.replace('_', '-').title()}: {item}")
+
+    if comparison["trend_escalation"]:
+        lines += ["", "## Trend escalations", ""]
+        lines += [f"- {item}" for item in comparison["trend_escalation"]]
+
+    labels = [f"U{idx + 1}" for idx in range(len(periods))]
+    lines += [
+        "",
+        "## Risk heat by update",
+        "",
+        "| Risk | " + " | ".join(labels) + " | Trend |",
+        "|---" * (len(labels) + 2) + "|",
+    ]
+    for row in comparison["risk_comparison_table"]:
+        cells = [row.get(label, "") for label in labels]
+        lines.append(f"| {row['risk']} | " + " | ".join(cells) + f" | {row['trend']} |")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_reports(output_dir, stream, stored):
+    """stored: load_comparison result ((comparison, periods) or None)."""
+    project_dir = os.path.join(output_dir, stream.project_id)
+    os.makedirs(project_dir, exist_ok=True)
+
+    with open(os.path.join(project_dir, "analyses.jsonl"), "w", encoding="utf-8") as f:
+        for path, period, result in zip(stream.paths, stream.periods, stream.results):
+            f.write(json.dumps({"file": path, "period": period, "result": result}) + "\n")
+
+    if stored is None:
+        return
+
+    comparison, periods = stored
+
+    with open(os.path.join(project_dir, "comparison.json"), "w", encoding="utf-8") as f:
+        json.dump(comparison, f, indent=2)
+
+    with open(os.path.join(project_dir, "comparison.md"), "w", encoding="utf-8") as f:
+        f.write(render_report(stream.project_id, periods, comparison))
+
+
+def load_period_map(output_dir, project_id):
+    """{file name: period} recorded by an earlier run ({} if none)."""
+    path = os.path.join(output_dir, project_id, "periods.json")
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_period_map(output_dir, project_id, paths, periods):
+    project_dir = os.path.join(output_dir, project_id)
+    os.makedirs(project_dir, exist_ok=True)
+
+    mapping = {os.path.basename(path): period for path, period in zip(paths, periods)}
+    with open(os.path.join(project_dir, "periods.json"), "w", encoding="utf-8") as f:
+        json.dump(mapping, f, indent=2)
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+
+def applied_count(periods, last_updated_period):
+    """
+    Leading periods (strictly increasing ISO weeks, see assign_periods)
+    up to and including memory's last_updated_period.
+    """
+    if last_updated_period is None:
+        return 0
+    return bisect_right(periods, last_updated_period)
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _post_process(raw, text):
+    """post_process_result in a worker process: (result, stage spans)."""
+    with capture_spans() as spans:
+        result = post_process_result(raw, text)
+    return result, spans
+
+
+def ingest_tree(root, output_dir=REPORT_DIR, pattern="*.txt", start_period=None,
+                chunked=None, llm_workers=None, processes=None, progress=None):
+    """
+    Ingests every project directory under root (see discover_projects).
+    Returns {project_id: {"updates", "periods", "report"}}.
+    """
+    say = progress or (lambda message: None)
+
+    projects = discover_projects(root, pattern)
+    if not projects:
+        raise ValueError(f"No updates matching {pattern} under {root}")
+
+    streams = {}
+    for project_id, paths in projects.items():
+        periods = assign_periods(
+            paths, start_period, known=load_period_map(output_dir, project_id)
+        )
+        save_period_map(output_dir, project_id, paths, periods)
+
+        last_period = load_memory(project_id).get("last_updated_period")
+        streams[project_id] = ProjectStream(
+            project_id, paths, periods, applied_count(periods, last_period)
+        )
+
+        if streams[project_id].already_applied:
+            say(
+                f"[{project_id}] memory already holds periods through "
+                f"{last_period}; {streams[project_id].already_applied} "
+                f"update(s) will not be applied again"
+            )
+
+    jobs = [
+        (stream, index, _read_text(path))
+        for stream in streams.values()
+        for index, path in enumerate(stream.paths)
+    ]
+    say(f"Ingesting {len(jobs)} updates across {len(streams)} project(s)")
+
+    llm_workers = max(1, min(llm_workers or BATCH_MAX_WORKERS, len(jobs)))
+    reports = {}
+
+    # spawn: forking while pool / client threads hold locks can deadlock
+    with request_context() as request_id, \
+            ThreadPoolExecutor(max_workers=llm_workers) as io_pool, \
+            ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as cpu_pool:
+
+        # future → (stage, stream, index, text)
+        pending = {
+            io_pool.submit(contextvars.copy_context().run, request_analysis, text, chunked):
+                ("llm", stream, index, text)
+            for stream, index, text in jobs
+        }
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                stage, stream, index, text = pending.pop(future)
+
+                if stage == "llm":
+                    # Deterministic post-processing off the main process
+                    pending[cpu_pool.submit(_post_process, future.result(), text)] = \
+                        ("normalize", stream, index, text)
+
+                elif stage == "normalize":
+                    result, spans = future.result()
+                    record_spans(spans)
+                    result["request_id"] = request_id
+                    stream.add(index, result)
+
+                    if stream.apply_ready():
+                        say(
+                            f"[{stream.project_id}] processed through "
+                            f"{stream.periods[stream.applied - 1]} "
+                            f"({stream.applied}/{len(stream.paths)})"
+                        )
+
+                    if stream.done:
+                        stored = load_comparison(stream.project_id)
+                        write_reports(output_dir, stream, stored)
+
+                        if stored is None:
+                            reports[stream.project_id] = None
+                        else:
+                            reports[stream.project_id] = os.path.join(
+                                output_dir, stream.project_id, "comparison.md"
+                            )
+                            say(f"[{stream.project_id}] report written to {reports[stream.project_id]}")
+
+    return {
+        project_id: {
+            "updates": len(stream.paths),
+            "periods": [stream.periods[0], stream.periods[-1]],
+            "report": reports.get(project_id),
+        }
+        for project_id, stream in streams.items()
+    }
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze a directory tree of stakeholder updates and write comparison reports."
+    )
+    parser.add_argument("root", help="directory tree; each directory of updates is one project")
+    parser.add_argument("--output", default=REPORT_DIR)
+    parser.add_argument("--pattern", default="*.txt")
+    parser.add_argument("--start-period", help="ISO week of each project's first update")
+    parser.add_argument("--chunking", choices=["auto", "on", "off"], default="auto")
+    parser.add_argument("--llm-workers", type=int, help=f"concurrent LLM calls (default {BATCH_MAX_WORKERS})")
+    parser.add_argument("--processes", type=int, help="post-processing processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = ingest_tree(
+            args.root,
+            output_dir=args.output,
+            pattern=args.pattern,
+            start_period=args.start_period,
+            chunked={"auto": None, "on": True, "off": False}[args.chunking],
+            llm_workers=args.llm_workers,
+            processes=args.processes,
+            progress=print,
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
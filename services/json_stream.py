@@ -0,0 +1,172 @@
+"""
+json_stream.py
+
+Incremental parser for a single streamed JSON object.
+Emits each top-level field as soon as its value is complete and,
+for selected array fields, each array element as soon as it closes.
+"""
+
+import json
+
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks as they arrive; each feed() returns new events:
+
+    - ("item", key, value)  → one complete element of a streamed array field
+    - ("field", key, value) → a complete top-level field
+
+    Anything before the first "{" (e.g. a ```json fence) is ignored,
+    as is anything after the top-level object closes.
+    """
+
+    def __init__(self, stream_keys=("risks", "warnings")):
+        self.stream_keys = set(stream_keys)
+
+        self._buf = ""
+        self._pos = 0
+        self._stack = []
+        self._done = False
+
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._string_is_key = False
+
+        self._scalar_start = None
+        self._scalar_depth = None
+
+        self._key = None
+        self._expect_value = False
+        self._value_start = None
+        self._item_start = None
+
+        self._start = None
+        self._end = None
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def feed(self, chunk: str):
+        self._buf += chunk
+        events = []
+
+        i = self._pos
+        while i < len(self._buf) and not self._done:
+            self._consume(i, self._buf[i], events)
+            i += 1
+
+        self._pos = i
+        return events
+
+    def result(self):
+        """Parse the complete object (raises ValueError if incomplete)."""
+        if self._start is None or self._end is None:
+            raise ValueError("Incomplete JSON object in stream")
+        return json.loads(self._buf[self._start:self._end])
+
+    @property
+    def text(self):
+        return self._buf
+
+    # -----------------------------
+    # Scanner
+    # -----------------------------
+
+    def _consume(self, i, c, events):
+        stack = self._stack
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                self._on_string_end(i, events)
+            return
+
+        # Wait for the top-level object
+        if not stack:
+            if c == "{":
+                self._start = i
+                stack.append(c)
+            return
+
+        # End of a bare scalar (number, true, false, null)
+        if self._scalar_start is not None and (c in _WHITESPACE or c in ",]}"):
+            depth = self._scalar_depth
+            self._scalar_start = None
+            self._complete(i, depth, events)
+
+        if c in _WHITESPACE or c == ",":
+            return
+
+        if c == ":":
+            if len(stack) == 1:
+                self._expect_value = True
+            return
+
+        if c in "}]":
+            stack.pop()
+            if not stack:
+                self._end = i + 1
+                self._done = True
+                return
+            self._complete(i + 1, len(stack), events)
+            return
+
+        # Still inside a bare scalar
+        if self._scalar_start is not None:
+            return
+
+        # Any other character starts a value (or a key)
+        self._on_value_start(i, len(stack))
+
+        if c == '"':
+            self._in_string = True
+            self._string_start = i
+            self._string_is_key = len(stack) == 1 and not self._expect_value
+        elif c in "{[":
+            stack.append(c)
+        else:
+            self._scalar_start = i
+            self._scalar_depth = len(stack)
+
+        if len(stack) == 1 or (c in "{[" and len(stack) == 2):
+            self._expect_value = False
+
+    def _on_value_start(self, i, depth):
+        if depth == 1 and self._expect_value:
+            self._value_start = i
+        elif (
+            depth == 2
+            and self._stack[-1] == "["
+            and self._key in self.stream_keys
+            and self._item_start is None
+        ):
+            self._item_start = i
+
+    def _on_string_end(self, i, events):
+        depth = len(self._stack)
+
+        if depth == 1 and self._string_is_key:
+            self._key = json.loads(self._buf[self._string_start:i + 1])
+            return
+
+        self._complete(i + 1, depth, events)
+
+    def _complete(self, end, depth, events):
+        if depth == 1 and self._value_start is not None:
+            value = json.loads(self._buf[self._value_start:end])
+            self._value_start = None
+            events.append(("field", self._key, value))
+
+        elif depth == 2 and self._item_start is not None:
+            value = json.loads(self._buf[self._item_start:end])
+            self._item_start = None
+            events.append(("item", self._key, value))
@@ -0,0 +1,197 @@
+"""
+keyword_matcher.py
+
+Single-pass keyword matching for the deterministic post-LLM rules.
+
+Every keyword table (normalization indicators, strong escalation
+keywords, risk-id rules) is compiled once into one alternation regex.
+A single scan of the lowercased text returns every hit with its offsets
+and the tables it belongs to, so cost stays linear in text length.
+
+Matching keeps the original substring semantics (`keyword in text`),
+including overlapping hits.
+"""
+
+import re
+from collections import namedtuple
+
+
+# -----------------------------
+# Keyword Tables
+# -----------------------------
+
+EARLY_INDICATORS = [
+    "initial",
+    "ongoing",
+    "pending",
+    "monitor",
+    "no immediate",
+    "at this stage",
+    "no major",
+    "early"
+]
+
+IMPACT_INDICATORS = [
+    "uat at risk",
+    "timeline impacted",
+    "schedule rebaseline",
+    "delay confirmed",
+    "will impact",
+    "now at risk"
+]
+
+ESCALATION_KEYWORDS_STRONG = [
+    "uat at risk",
+    "schedule rebaseline",
+    "leadership attention",
+    "timeline will be impacted",
+    "requires escalation"
+]
+
+# Ordered: the first rule with a hit decides the risk_id
+RISK_ID_RULES = [
+    ("vendor_dependency", ["vendor", "external", "third party"]),
+    ("team_capacity", ["team", "morale", "capacity", "bandwidth"]),
+    ("cost_overrun", ["cost", "budget", "overrun"]),
+    ("quality_risk", ["quality", "defect", "rework"]),
+]
+
+KEYWORD_TABLES = {
+    "early": EARLY_INDICATORS,
+    "impact": IMPACT_INDICATORS,
+    "escalation_strong": ESCALATION_KEYWORDS_STRONG,
+}
+for _risk_id, _keywords in RISK_ID_RULES:
+    KEYWORD_TABLES[f"risk_id:{_risk_id}"] = _keywords
+
+
+KeywordHit = namedtuple("KeywordHit", ["keyword", "start", "end", "tables"])
+
+
+# -----------------------------
+# Matcher
+# -----------------------------
+
+class KeywordMatcher:
+    """
+    Compiled matcher over named keyword tables ({table: [keyword, ...]}).
+    Keywords are matched case-insensitively as plain substrings.
+    """
+
+    def __init__(self, tables):
+        self.tables = {name: list(words) for name, words in tables.items()}
+
+        self._tables_by_keyword = {}
+        for name, words in self.tables.items():
+            for word in words:
+                self._tables_by_keyword.setdefault(word.lower(), set()).add(name)
+
+        # Longest first, so each position reports its longest keyword;
+        # shorter keywords that are prefixes of it are added back below.
+        keywords = sorted(self._tables_by_keyword, key=len, reverse=True)
+
+        # Zero-width lookahead: a hit at every position, overlaps included
+        self._pattern = re.compile(
+            "(?=(" + "|".join(re.escape(k) for k in keywords) + "))"
+        )
+
+        self._prefixes = {
+            keyword: [
+                other for other in keywords
+                if other != keyword and keyword.startswith(other)
+            ]
+            for keyword in keywords
+        }
+
+    def scan(self, text: str):
+        """Returns every KeywordHit in text, ordered by offset."""
+        lowered = text.lower()
+        hits = []
+
+        for match in self._pattern.finditer(lowered):
+            start = match.start()
+            longest = match.group(1)
+
+            for keyword in [longest] + self._prefixes[longest]:
+                hits.append(KeywordHit(
+                    keyword,
+                    start,
+                    start + len(keyword),
+                    frozenset(self._tables_by_keyword[keyword])
+                ))
+
+        return hits
+
+    def tables_hit(self, text: str):
+        """Names of all tables with at least one keyword in text."""
+        hit = set()
+        for match in self._pattern.finditer(text.lower()):
+            longest = match.group(1)
+            hit.update(self._tables_by_keyword[longest])
+            for keyword in self._prefixes[longest]:
+                hit.update(self._tables_by_keyword[keyword])
+        return hit
+
+
+# Built once at import from all rule tables
+MATCHER = KeywordMatcher(KEYWORD_TABLES)
+
+
+# -----------------------------
+# Per-Update Text Signals
+# -----------------------------
+
+# Tables describing the stakeholder update (risk-id tables describe risks)
+SIGNAL_TABLES = ("early", "impact", "escalation_strong")
+
+
+class TextSignals:
+    """
+    Rule signals for one stakeholder update, computed once per update
+    and shared by every post-LLM stage (normalization, escalation, ...).
+    """
+
+    __slots__ = ("hits", "tables")
+
+    def __init__(self, hits):
+        self.hits = [h for h in hits if h.tables.intersection(SIGNAL_TABLES)]
+        self.tables = set()
+        for hit in self.hits:
+            self.tables.update(hit.tables)
+
+    @classmethod
+    def from_text(cls, text: str, matcher=None):
+        return cls((matcher or MATCHER).scan(text))
+
+    @property
+    def is_early(self) -> bool:
+        return "early" in self.tables
+
+    @property
+    def has_real_impact(self) -> bool:
+        return "impact" in self.tables
+
+    @property
+    def strong_signal(self) -> bool:
+        return "escalation_strong" in self.tables
+
+    def matches(self, table: str):
+        """Hits belonging to one table, ordered by offset."""
+        return [h for h in self.hits if table in h.tables]
+
+    def as_dict(self) -> dict:
+        """JSON-safe form, returned with the analysis result."""
+        return {
+            "is_early": self.is_early,
+            "has_real_impact": self.has_real_impact,
+            "strong_signal": self.strong_signal,
+            "matches": [
+                {
+                    "phrase": h.keyword,
+                    "start": h.start,
+                    "end": h.end,
+                    "tables": sorted(h.tables.intersection(SIGNAL_TABLES)),
+                }
+                for h in self.hits
+            ],
+        }
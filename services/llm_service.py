@@ -1,29 +1,409 @@
 import os
 import json
-from openai import OpenAI
+import time
+import random
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
 
+# openai is imported on first use (get_client / retryable_errors): pages
+# running on the fallback path never pay for it
 
-def call_llm(prompt: str):
+from services.json_stream import IncrementalJSONParser
+from services.metrics import span, observe
+from services.llm_validation import (
+    REASK_MAX_FIELDS,
+    response_format,
+    parse_analysis,
+    reask_prompt,
+    apply_field_answers,
+)
+from services.cache_service import (
+    cache_enabled,
+    cache_key,
+    get_cached,
+    put_cached,
+)
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+LLM_MODEL = "gpt-4o-mini"
+LLM_TEMPERATURE = 0.3
+
+LLM_CONNECT_TIMEOUT = float(os.getenv("GPMOID_LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("GPMOID_LLM_READ_TIMEOUT", "60"))
+
+LLM_MAX_RETRIES = int(os.getenv("GPMOID_LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = 0.5   # seconds
+LLM_BACKOFF_MAX = 8.0    # seconds
+
+# json_schema (strict, from schemas.LLMAnalysisResult) | json_object | text
+LLM_RESPONSE_FORMAT = os.getenv("GPMOID_LLM_RESPONSE_FORMAT", "json_schema")
+
+# Field-level re-ask for responses that fail validation after local repair
+LLM_REASK = os.getenv("GPMOID_LLM_REASK", "on").lower() not in ("off", "0", "false")
+
+# Process-wide cap on requests in flight, however the callers' thread
+# pools nest (batch workers × chunk workers)
+LLM_MAX_CONCURRENCY = max(1, int(os.getenv("GPMOID_LLM_MAX_CONCURRENCY", "8")))
+
+_request_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+# -----------------------------
+# Process-wide Client
+# -----------------------------
+
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def llm_base_url():
+    """
+    Endpoint override, e.g. a local stand-in server for testing.
+    None → the SDK default (api.openai.com).
+    """
+    return (
+        os.getenv("GPMOID_LLM_BASE_URL")
+        or os.getenv("OPENAI_BASE_URL")
+        or None
+    )
+
+
+def get_client():
+    """
+    Returns the shared OpenAI client, or None if no API key is set.
+
+    The client is reused across calls so its HTTP connection pool
+    (keep-alive connections, TLS sessions) survives between requests.
+    It is rebuilt only when the key or endpoint changes.
+    """
+    global _client, _client_config
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+
+    config = (api_key, llm_base_url())
+
+    with _client_lock:
+        if _client is None or _client_config != config:
+            from openai import OpenAI, Timeout
+
+            _client = OpenAI(
+                api_key=api_key,
+                base_url=config[1],
+                timeout=Timeout(
+                    LLM_READ_TIMEOUT,
+                    connect=LLM_CONNECT_TIMEOUT
+                ),
+                max_retries=0  # retries handled below, with jitter
+            )
+            _client_config = config
+
+    return _client
+
+
+# -----------------------------
+# Retries
+# -----------------------------
+
+@lru_cache(maxsize=1)
+def retryable_errors():
+    """Transient failures worth retrying (APITimeoutError is an APIConnectionError)."""
+    from openai import APIConnectionError, RateLimitError, InternalServerError
+
+    return (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def _backoff_delay(attempt):
+    """Exponential backoff with full jitter."""
+    ceiling = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def _response_format():
+    if LLM_RESPONSE_FORMAT == "json_schema":
+        return response_format()
+    if LLM_RESPONSE_FORMAT == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def _cache_key(prompt):
+    """Cache key of a request: responses differ by endpoint and format too."""
+    return cache_key(
+        prompt,
+        LLM_MODEL,
+        LLM_TEMPERATURE,
+        base_url=llm_base_url(),
+        response_format=_response_format()
+    )
+
+
+def chat_request_body(prompt, response_format=None):
+    """chat.completions request body (also a batch-request line body)."""
+    body = {
+        "model": LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": LLM_TEMPERATURE,
+    }
+    if response_format:
+        body["response_format"] = response_format
+    return body
+
+
+def _send(client, body, stream=False):
+    """
+    chat.completions.create with retries. Each attempt holds one of the
+    LLM_MAX_CONCURRENCY request slots (released during backoff). Streams
+    are read after this returns, so their caller holds the slot for the
+    whole stream instead (see stream_llm).
+    """
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            with nullcontext() if stream else _request_slots:
+                return client.chat.completions.create(stream=stream, **body)
+        except retryable_errors():
+            if attempt >= LLM_MAX_RETRIES:
+                raise
+            time.sleep(_backoff_delay(attempt))
+
+
+def _create_completion(client, prompt, stream=False, response_format=None):
+    return _send(client, chat_request_body(prompt, response_format), stream)
+
+
+# -----------------------------
+# Validation / Repair
+# -----------------------------
+
+def _reask_fields(client, data, errors):
+    """
+    Field-level re-ask: sends only the invalid fields back to the LLM and
+    patches the answers in. Returns the validated result, or None.
+    """
+    if not LLM_REASK or len(errors) > REASK_MAX_FIELDS:
+        return None
+
+    try:
+        with span("llm_call", reask=True):
+            response = _create_completion(
+                client,
+                reask_prompt(data, errors),
+                response_format={"type": "json_object"}
+            )
+
+        answers = json.loads(response.choices[0].message.content)
+        if not isinstance(answers, dict):
+            return None
+
+    except Exception:
+        return None
+
+    patched = apply_field_answers(data, answers)
+    result, _, _ = parse_analysis(json.dumps(patched))
+    return result
+
+
+def validate_response(content, client=None):
+    """
+    Validated result dict from raw response content: repaired locally,
+    then by field-level re-ask when a client is given. None if unusable.
+    """
+    with span("json_parse"):
+        result, data, errors = parse_analysis(content)
+
+    if result is None and data is not None and client is not None:
+        result = _reask_fields(client, data, errors)
+
+    return result
+
+
+# -----------------------------
+# Batch Requests
+# -----------------------------
+
+def batch_request_body(prompt: str):
+    """Request body for one line of a batch-request JSONL file."""
+    return chat_request_body(prompt, _response_format())
+
+
+def complete_request(body):
+    """
+    Sends one batch-request body as a regular call (local batch stand-in).
+    Returns the raw response content, or None if the key is missing or
+    the call fails.
+    """
+    client = get_client()
+
+    if client is None:
+        return None
+
+    try:
+        with span("llm_call", batch=True):
+            response = _send(client, body)
+        return response.choices[0].message.content
+    except Exception:
+        return None
+
+
+# -----------------------------
+# Main Entry
+# -----------------------------
+
+def call_llm(prompt: str, use_cache: bool = True):
     """
     Calls the LLM if API key is available.
     Returns None if key is missing or call fails.
+
+    Successful responses are cached on disk, keyed on prompt + model +
+    temperature + endpoint + response format (see cache_service.cache_key);
+    pass use_cache=False (or set GPMOID_LLM_CACHE=off) to bypass the cache.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    client = get_client()
 
-    if not api_key:
+    if client is None:
         return None  # Graceful fallback
 
-    try:
-        client = OpenAI(api_key=api_key)
+    caching = use_cache and cache_enabled()
+    key = _cache_key(prompt)
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
+    if caching:
+        cached = get_cached(key)
+        if cached is not None:
+            return cached
+
+    try:
+        with span("llm_call"):
+            response = _create_completion(
+                client, prompt, response_format=_response_format()
+            )
 
         content = response.choices[0].message.content
-        return json.loads(content)
+
+        # Completed call with a broken answer: repaired, not discarded
+        result = validate_response(content, client)
 
     except Exception:
         return None
+
+    if result is None:
+        return None
+
+    if caching:
+        try:
+            put_cached(key, result)
+        except OSError:
+            pass  # Cache is best-effort
+
+    return result
+
+
+# -----------------------------
+# Streaming Entry
+# -----------------------------
+
+def stream_llm(prompt: str, use_cache: bool = True):
+    """
+    Streaming variant of call_llm.
+
+    Yields ("item", key, value) / ("field", key, value) events as the
+    JSON response is parsed incrementally (see IncrementalJSONParser),
+    then a final ("done", None, result) where result is the full parsed
+    response, or None if the key is missing or the call fails.
+    Cache hits replay the cached response as a single chunk.
+
+    Malformed JSON (e.g. a trailing comma) stops the events, not the
+    stream: the full text is still validated and repaired like call_llm.
+    """
+    client = get_client()
+
+    if client is None:
+        yield ("done", None, None)
+        return
+
+    caching = use_cache and cache_enabled()
+    key = _cache_key(prompt)
+    parser = IncrementalJSONParser()
+
+    if caching:
+        cached = get_cached(key)
+        if cached is not None:
+            yield from parser.feed(json.dumps(cached))
+            yield ("done", None, cached)
+            return
+
+    # Stage timings exclude the time the consumer spends between events
+    started = time.perf_counter()
+    consumer_time = 0.0
+    parse_time = 0.0
+    chunks = []
+
+    try:
+        # Slot held until the stream is read to the end (or closed)
+        with _request_slots:
+            stream = _create_completion(
+                client, prompt, stream=True, response_format=_response_format()
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    if parser is None:
+                        continue  # events stopped, text still collected
+
+                    mark = time.perf_counter()
+                    try:
+                        events = parser.feed(delta)
+                    except ValueError:
+                        parser, events = None, []
+                    parse_time += time.perf_counter() - mark
+
+                    mark = time.perf_counter()
+                    yield from events
+                    consumer_time += time.perf_counter() - mark
+
+        # The final result is validated from the full text, not the events
+        mark = time.perf_counter()
+        result, data, errors = parse_analysis("".join(chunks))
+        parse_time += time.perf_counter() - mark
+
+    except Exception:
+        observe(
+            "llm_call",
+            time.perf_counter() - started - consumer_time - parse_time,
+            ok=False,
+            stream=True
+        )
+        yield ("done", None, None)
+        return
+
+    observe(
+        "llm_call",
+        time.perf_counter() - started - consumer_time - parse_time,
+        stream=True
+    )
+    observe("json_parse", parse_time, stream=True)
+
+    if result is None and data is not None:
+        result = _reask_fields(client, data, errors)
+
+    if result is None:
+        yield ("done", None, None)
+        return
+
+    if caching:
+        try:
+            put_cached(key, result)
+        except OSError:
+            pass  # Cache is best-effort
+
+    yield ("done", None, result)
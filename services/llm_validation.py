@@ -0,0 +1,277 @@
+"""
+llm_validation.py
+
+Schema-constrained LLM output for stakeholder update analysis.
+
+The response schema is derived from schemas.LLMAnalysisResult and sent
+as a strict json_schema response_format. Responses are validated
+straight from the raw text with pydantic-core (no intermediate
+json.loads), and an invalid response is repaired rather than thrown
+away, cheapest step first:
+
+1. local repair: strip fences / prose around the object, drop trailing
+   commas, default missing warnings, canonicalize enum spellings
+   ("high" → "High", "near term" → "Near-term")
+2. field-level re-ask: only the fields still invalid are sent back to
+   the LLM (see reask_prompt), and the answers are patched in
+
+pydantic and the schemas are imported on first use, so pages that only
+ever run the fallback path do not load them.
+"""
+
+import re
+import json
+import copy
+from functools import lru_cache
+from typing import get_args
+
+
+# Beyond this many invalid fields a re-ask is not worth it
+REASK_MAX_FIELDS = 12
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+# -----------------------------
+# Lazy Models
+# -----------------------------
+
+@lru_cache(maxsize=1)
+def _models():
+    """(LLMAnalysisResult, ValidationError), imported on first use."""
+    from pydantic import ValidationError
+    from schemas import LLMAnalysisResult
+
+    return LLMAnalysisResult, ValidationError
+
+
+@lru_cache(maxsize=1)
+def _risk_model():
+    from schemas import LLMRisk
+
+    return LLMRisk
+
+
+@lru_cache(maxsize=1)
+def enum_fields():
+    """{risk field: allowed values} for the Literal-typed risk fields."""
+    from schemas import Severity, ResponseStrategy, AttentionLevel
+
+    return {
+        "severity": get_args(Severity),
+        "response_strategy": get_args(ResponseStrategy),
+        "attention_level": get_args(AttentionLevel),
+    }
+
+
+# -----------------------------
+# Response Schema
+# -----------------------------
+
+def _strict(schema):
+    """OpenAI strict mode: closed objects, every property required."""
+    if isinstance(schema, dict):
+        if schema.get("type") == "object" and "properties" in schema:
+            schema["additionalProperties"] = False
+            schema["required"] = list(schema["properties"])
+        for value in schema.values():
+            _strict(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            _strict(value)
+    return schema
+
+
+@lru_cache(maxsize=1)
+def response_schema():
+    model, _ = _models()
+    return _strict(model.model_json_schema())
+
+
+def response_format():
+    """response_format argument for chat.completions.create."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "analysis_result",
+            "strict": True,
+            "schema": copy.deepcopy(response_schema()),
+        },
+    }
+
+
+# -----------------------------
+# Validation
+# -----------------------------
+
+def validate_raw(raw):
+    """Validated result dict from raw JSON text / bytes (raises ValidationError)."""
+    model, _ = _models()
+    return model.model_validate_json(raw).model_dump()
+
+
+def field_errors(data):
+    """[(path tuple, message)] for every schema violation in data."""
+    model, validation_error = _models()
+    try:
+        model.model_validate(data)
+        return []
+    except validation_error as e:
+        return [(tuple(err["loc"]), err["msg"]) for err in e.errors()]
+
+
+# -----------------------------
+# Local Repair
+# -----------------------------
+
+def _extract_object(text):
+    """Outermost {...} of text (drops fences and surrounding prose)."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    return text[start:end + 1]
+
+
+def _canonical_key(value):
+    return re.sub(r"[^a-z]", "", value.lower())
+
+
+def _canonical_enum(value, allowed):
+    if not isinstance(value, str):
+        return value
+    lookup = {_canonical_key(a): a for a in allowed}
+    return lookup.get(_canonical_key(value), value)
+
+
+def _canonicalize_risk(risk):
+    for field, allowed in enum_fields().items():
+        if field in risk:
+            risk[field] = _canonical_enum(risk[field], allowed)
+
+
+def repair_locally(text):
+    """
+    Best-effort structural repair of a response that failed validation.
+    Returns the repaired data (possibly still invalid), or None when no
+    JSON object can be recovered.
+    """
+    candidate = _extract_object(text)
+    if candidate is None:
+        return None
+
+    candidate = _TRAILING_COMMA.sub(r"\1", candidate)
+
+    try:
+        data = json.loads(candidate)
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    if data.get("warnings") is None:
+        data["warnings"] = []
+
+    for risk in data.get("risks") or []:
+        if isinstance(risk, dict):
+            _canonicalize_risk(risk)
+
+    return data
+
+
+def parse_risk(item):
+    """
+    One streamed risk (an "item" event), with enum spellings repaired
+    as in repair_locally. Returns the validated risk dict, or None.
+    """
+    if not isinstance(item, dict):
+        return None
+
+    risk = dict(item)
+    _canonicalize_risk(risk)
+
+    _, validation_error = _models()
+    try:
+        return _risk_model().model_validate(risk).model_dump()
+    except validation_error:
+        return None
+
+
+def parse_analysis(text):
+    """
+    Validates a raw response, repairing it locally if needed.
+
+    Returns (result, data, errors):
+    - result: validated result dict, or None
+    - data / errors: the repaired data and its remaining field errors,
+      for a field-level re-ask (data is None if nothing was recoverable)
+    """
+    model, validation_error = _models()
+    try:
+        return validate_raw(text), None, []
+    except validation_error:
+        pass
+
+    data = repair_locally(text)
+    if data is None:
+        return None, None, []
+
+    errors = field_errors(data)
+    if not errors:
+        return model.model_validate(data).model_dump(), data, []
+
+    return None, data, errors
+
+
+# -----------------------------
+# Field-level Re-ask
+# -----------------------------
+
+def _path(loc):
+    return ".".join(str(part) for part in loc)
+
+
+def _hint(loc):
+    field = loc[-1] if loc else None
+    if field in enum_fields():
+        return "one of " + ", ".join(enum_fields()[field])
+    return "a value of the right type"
+
+
+def reask_prompt(data, errors):
+    """
+    Small follow-up prompt asking only for the invalid fields.
+    The answer is a JSON object mapping each field path to its value.
+    """
+    fields = "\n".join(
+        f"- {_path(loc)}: {message} (expected {_hint(loc)})"
+        for loc, message in errors
+    )
+
+    return f"""
+You returned this project update analysis, but some fields are missing or invalid:
+
+{json.dumps(data, indent=2)}
+
+Fields to fix:
+{fields}
+
+Return STRICT JSON only: an object mapping each field path above to its corrected value.
+"""
+
+
+def apply_field_answers(data, answers):
+    """Patches {"risks.1.severity": "High", ...} answers into data (in place)."""
+    for path, value in answers.items():
+        parts = [int(p) if p.isdigit() else p for p in str(path).split(".")]
+
+        target = data
+        try:
+            for part in parts[:-1]:
+                target = target[part]
+            target[parts[-1]] = value
+        except (KeyError, IndexError, TypeError):
+            continue  # Path the data cannot hold; left to validation
+
+    return data
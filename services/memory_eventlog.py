@@ -0,0 +1,329 @@
+"""
+memory_eventlog.py
+
+Append-only event-log storage backend for longitudinal memory.
+
+Layout per project (under memory/):
+- project_<id>.snapshot.json     → {"generation": g, "memory": {...}}
+- project_<id>.events.<g>.jsonl  → one line per update_memory call
+
+State = snapshot + every event batch in logs with generation >= g.
+Appends, rotation and snapshot swaps hold the project's advisory file
+lock, so several processes can share one memory directory.
+Writes append one line (O(changes)); a torn final line only loses that
+batch and is skipped on load. Once a log exceeds COMPACT_EVERY batches
+it is rotated and folded into a new snapshot on a background thread.
+"""
+
+import os
+import json
+import glob
+import threading
+
+from services.file_lock import file_lock
+from services.memory_migrations import migrate_memory
+from services.risk_history import decode_memory, encode_memory
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+COMPACT_EVERY = int(os.getenv("GPMOID_MEMORY_COMPACT_EVERY", "50"))
+
+_log_state = {}   # project_id → {"generation": g, "batches": n} (this process)
+
+
+# -----------------------------
+# Paths / Locks
+# -----------------------------
+
+def _memory_dir():
+    # Shares memory_service.MEMORY_DIR (imported lazily: it imports us)
+    from services.memory_service import MEMORY_DIR
+    return MEMORY_DIR
+
+
+def snapshot_path(project_id):
+    return os.path.join(_memory_dir(), f"project_{project_id}.snapshot.json")
+
+
+def log_path(project_id, generation):
+    return os.path.join(_memory_dir(), f"project_{project_id}.events.{generation}.jsonl")
+
+
+def _log_generations(project_id):
+    prefix = f"project_{project_id}.events."
+    generations = []
+
+    for path in glob.glob(os.path.join(_memory_dir(), f"{glob.escape(prefix)}*.jsonl")):
+        suffix = os.path.basename(path)[len(prefix):-len(".jsonl")]
+        if suffix.isdigit():
+            generations.append(int(suffix))
+
+    return sorted(generations)
+
+
+def _project_lock(project_id):
+    # Same lock file as memory_service, so nesting is re-entrant
+    from services.memory_service import memory_lock_path
+    return file_lock(memory_lock_path(project_id))
+
+
+def _ensure_dir():
+    if not os.path.exists(_memory_dir()):
+        os.makedirs(_memory_dir(), exist_ok=True)
+
+
+def list_projects():
+    projects = set()
+    for path in glob.glob(os.path.join(_memory_dir(), "project_*")):
+        name = os.path.basename(path)[len("project_"):]
+        for marker in (".snapshot.json", ".events."):
+            if marker in name:
+                projects.add(name[:name.index(marker)])
+    return sorted(projects)
+
+
+# -----------------------------
+# Load
+# -----------------------------
+
+def _read_snapshot(project_id):
+    """Returns (generation, memory or None)."""
+    path = snapshot_path(project_id)
+    if not os.path.exists(path):
+        return 0, None
+
+    with open(path, "r") as f:
+        snapshot = json.load(f)
+
+    return snapshot["generation"], snapshot["memory"]
+
+
+def _read_batches(path):
+    batches = []
+
+    try:
+        f = open(path, "r")
+    except FileNotFoundError:
+        return batches  # folded and removed by a concurrent compaction
+
+    with f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                continue  # torn write: this batch never committed
+            if isinstance(batch, dict) and "events" in batch:
+                batches.append(batch)
+
+    return batches
+
+
+def _materialize(project_id, upto_generation=None):
+    """
+    Snapshot + log tail (logs up to upto_generation, if given).
+    Returns (memory or None, snapshot generation).
+    """
+    from services.memory_service import (
+        MEMORY_VERSION,
+        apply_memory_event,
+        _fresh_memory,
+    )
+
+    generation, memory = _read_snapshot(project_id)
+    if memory is not None:
+        # Older snapshots are upgraded here and rewritten at next compaction
+        migrate_memory(memory, MEMORY_VERSION)
+        decode_memory(memory)
+
+    for g in _log_generations(project_id):
+        if g < generation:
+            continue  # already folded into the snapshot
+        if upto_generation is not None and g > upto_generation:
+            break
+
+        for batch in _read_batches(log_path(project_id, g)):
+            if memory is None:
+                memory = _fresh_memory(project_id)
+            for event in batch["events"]:
+                apply_memory_event(memory, event)
+            if "revision" in batch:
+                memory["revision"] = batch["revision"]
+
+    return memory, generation
+
+
+def load_project(project_id):
+    """Returns the materialized memory dict, or None if nothing was saved."""
+    with _project_lock(project_id):
+        memory, _ = _materialize(project_id)
+        return memory
+
+
+def project_stamp(project_id):
+    """Change detector for cache invalidation: stat of snapshot + logs."""
+    paths = [snapshot_path(project_id)] + [
+        log_path(project_id, g) for g in _log_generations(project_id)
+    ]
+    stamp = []
+
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+
+    return tuple(stamp)
+
+
+# -----------------------------
+# Append
+# -----------------------------
+
+def _current_generation(project_id):
+    """
+    The log generation appends go to: the newest log on disk (rotation
+    creates the next log file up front), else the snapshot's generation.
+    Read from disk each time so every process appends to the same log.
+    """
+    generations = _log_generations(project_id)
+    if generations:
+        return generations[-1]
+    return _read_snapshot(project_id)[0]
+
+
+def _current_log(project_id):
+    generation = _current_generation(project_id)
+    state = _log_state.get(project_id)
+
+    if state is None or state["generation"] != generation:
+        path = log_path(project_id, generation)
+        batches = len(_read_batches(path)) if os.path.exists(path) else 0
+
+        state = {"generation": generation, "batches": batches}
+        _log_state[project_id] = state
+
+    return state
+
+
+def append_events(events, project_id, revision=None):
+    """Appends one batch of memory events as a single log line."""
+    _ensure_dir()
+
+    batch = {"events": events}
+    if revision is not None:
+        batch["revision"] = revision
+    line = json.dumps(batch, separators=(",", ":")) + "\n"
+
+    with _project_lock(project_id):
+        state = _current_log(project_id)
+        path = log_path(project_id, state["generation"])
+
+        with open(path, "a+b") as f:
+            # Terminate a torn previous line so this batch stays parseable
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+        state["batches"] += 1
+
+        if state["batches"] >= COMPACT_EVERY:
+            _rotate_and_compact(project_id)
+
+
+def replace_project(memory, project_id):
+    """Writes memory as a new snapshot, superseding all existing logs."""
+    _ensure_dir()
+
+    with _project_lock(project_id):
+        generation = _rotate(project_id)
+
+        _write_snapshot(project_id, generation + 1, memory)
+        _drop_logs_before(project_id, generation + 1)
+
+
+# -----------------------------
+# Compaction
+# -----------------------------
+
+def _rotate(project_id):
+    """
+    Seals the current log by creating the next one (caller holds the
+    project lock). Returns the sealed generation.
+    """
+    sealed = _current_generation(project_id)
+    open(log_path(project_id, sealed + 1), "a").close()
+    return sealed
+
+
+def _rotate_and_compact(project_id):
+    """
+    Seals the current log for subsequent appends and folds it into
+    a snapshot on a background thread.
+    """
+    sealed = _rotate(project_id)
+
+    thread = threading.Thread(
+        target=compact_project,
+        args=(project_id, sealed),
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def compact_project(project_id, sealed_generation=None):
+    """
+    Folds the snapshot and all sealed logs (<= sealed_generation) into a
+    new snapshot, then deletes the folded logs. With no generation given,
+    the current log is sealed first.
+
+    Sealed logs are immutable, so they are replayed without holding the
+    project lock; appends to the current log continue meanwhile.
+    """
+    if sealed_generation is None:
+        with _project_lock(project_id):
+            sealed_generation = _rotate(project_id)
+
+    memory, base_generation = _materialize(project_id, sealed_generation)
+    if memory is None:
+        return
+
+    with _project_lock(project_id):
+        # Superseded by another compaction or a replace_project
+        if _read_snapshot(project_id)[0] != base_generation:
+            return
+
+        _write_snapshot(project_id, sealed_generation + 1, memory)
+        _drop_logs_before(project_id, sealed_generation + 1)
+
+
+def _write_snapshot(project_id, generation, memory):
+    path = snapshot_path(project_id)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump({"generation": generation, "memory": encode_memory(memory)}, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def _drop_logs_before(project_id, generation):
+    for g in _log_generations(project_id):
+        if g < generation:
+            try:
+                os.remove(log_path(project_id, g))
+            except OSError:
+                pass
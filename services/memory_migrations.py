@@ -0,0 +1,154 @@
+"""
+memory_migrations.py
+
+Versioned, one-time upgrades for stored project memory.
+
+Each migration back-fills what its version introduced and is applied
+only to memory stamped with an older version. Memory already at the
+target version takes the fast path with no per-risk inspection.
+
+Bulk offline upgrade of a memory directory:
+    python -m services.memory_migrations memory/
+"""
+
+import os
+import glob
+import json
+import argparse
+
+from services.risk_history import compact_legacy_memory
+
+
+# -----------------------------
+# Migrations
+# -----------------------------
+
+def _backfill_v1_3(memory):
+    """
+    Pre-1.3 files: periods_seen / periods_open, confidence (v1.3)
+    and the resolution structure.
+    """
+    for risk in memory.get("risks", {}).values():
+
+        # periods_seen introduced later
+        if "periods_seen" not in risk:
+            last_seen = risk.get("last_seen_period")
+            risk["periods_seen"] = [last_seen] if last_seen else []
+
+        # periods_open introduced later
+        if "periods_open" not in risk:
+            risk["periods_open"] = len(risk["periods_seen"])
+
+        # confidence introduced in v1.3
+        if "confidence" not in risk:
+            risk["confidence"] = {
+                "level": "High",
+                "absence_count": 0,
+                "last_confident_period": risk.get("last_seen_period")
+            }
+
+        # resolution structure normalization
+        if "resolution" not in risk:
+            risk["resolution"] = {
+                "is_resolved": False,
+                "resolved_period": None,
+                "resolution_reason": None
+            }
+
+
+def _compact_v1_4(memory):
+    """
+    v1.4: periods_seen / heat_history / attention_history lists → a
+    project period table plus encoded per-risk history buffers.
+    """
+    compact_legacy_memory(memory)
+
+
+# (target version, upgrade function), in ascending order
+MIGRATIONS = [
+    ("1.3", _backfill_v1_3),
+    ("1.4", _compact_v1_4),
+]
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def version_key(version):
+    """"1.3" → (1, 3); missing or malformed versions sort first."""
+    try:
+        return tuple(int(part) for part in str(version).split("."))
+    except ValueError:
+        return (0,)
+
+
+def migrate_memory(memory, target_version):
+    """
+    Upgrades memory in place to target_version.
+    Returns True if anything was migrated (the caller should persist it).
+    """
+    current = memory.get("memory_version")
+
+    # Fast path: already current
+    if current == target_version:
+        return False
+
+    current_key = version_key(current) if current else (0,)
+
+    for version, upgrade in MIGRATIONS:
+        if current_key < version_key(version) <= version_key(target_version):
+            upgrade(memory)
+
+    memory["memory_version"] = target_version
+    return True
+
+
+# -----------------------------
+# Bulk Offline Migration
+# -----------------------------
+
+def migrate_memory_dir(memory_dir="memory"):
+    """
+    Upgrades every project_<id>.json and event-log snapshot in memory_dir.
+    Returns the list of files that were rewritten.
+    """
+    from services.memory_service import MEMORY_VERSION
+
+    rewritten = []
+
+    for path in sorted(glob.glob(os.path.join(memory_dir, "project_*.json"))):
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        is_snapshot = path.endswith(".snapshot.json")
+        memory = data["memory"] if is_snapshot else data
+
+        if not migrate_memory(memory, MEMORY_VERSION):
+            continue
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=None if is_snapshot else 2)
+        os.replace(tmp_path, path)
+
+        rewritten.append(path)
+
+    return rewritten
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Upgrade project memory files to the current memory version."
+    )
+    parser.add_argument("memory_dir", nargs="?", default="memory")
+    args = parser.parse_args(argv)
+
+    rewritten = migrate_memory_dir(args.memory_dir)
+    print(f"Upgraded {len(rewritten)} file(s)")
+    for path in rewritten:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
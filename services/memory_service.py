@@ -1,7 +1,27 @@
 import os
+import re
+import glob
 import json
+import time
+import random
+import threading
 from datetime import datetime
 
+from services import memory_sqlite, memory_eventlog
+from services.file_lock import file_lock
+from services.metrics import span
+from services.memory_migrations import migrate_memory
+from services.risk_history import (
+    PeriodTable,
+    copy_memory,
+    decode_memory,
+    encode_memory,
+    last_heat,
+    new_history,
+    record_observation,
+    seen_in,
+)
+
 
 # -----------------------------
 # Config
@@ -9,10 +29,24 @@ from datetime import datetime
 
 MEMORY_DIR = "memory"
 DEFAULT_PROJECT_ID = "default"
-MEMORY_VERSION = "1.3"  # confidence + decay
+MEMORY_VERSION = "1.4"  # compact risk history (see risk_history)
 
 RESOLUTION_ABSENCE_THRESHOLD = 2  # after confidence reaches Low
 
+# Storage backend: "json" (memory/project_<id>.json), "sqlite" or "eventlog"
+MEMORY_BACKEND = os.getenv("GPMOID_MEMORY_BACKEND", "json").strip().lower()
+
+# Optimistic-concurrency retries when another writer got there first
+MEMORY_WRITE_RETRIES = int(os.getenv("GPMOID_MEMORY_WRITE_RETRIES", "5"))
+
+# project_id → ((backend, stamp), memory)
+_memory_cache = {}
+_memory_cache_lock = threading.Lock()
+
+
+class MemoryConflictError(RuntimeError):
+    """Stored memory revision moved on since it was loaded."""
+
 
 # -----------------------------
 # Helpers
@@ -30,74 +64,375 @@ def normalize_period(period_id):
     return current_period()
 
 
+def normalize_project_id(project_id):
+    """File-safe project id (used in memory file names); blank → default."""
+    if not project_id or not str(project_id).strip():
+        return DEFAULT_PROJECT_ID
+    return re.sub(r"[^a-z0-9_-]+", "_", str(project_id).strip().lower())
+
+
 def memory_file_path(project_id=DEFAULT_PROJECT_ID):
     return os.path.join(MEMORY_DIR, f"project_{project_id}.json")
 
 
+def memory_lock_path(project_id=DEFAULT_PROJECT_ID):
+    """Advisory lock file guarding writes to one project's memory."""
+    return os.path.join(MEMORY_DIR, f"project_{project_id}.lock")
+
+
 def ensure_memory_dir():
     if not os.path.exists(MEMORY_DIR):
-        os.makedirs(MEMORY_DIR)
+        os.makedirs(MEMORY_DIR, exist_ok=True)
 
 
 # -----------------------------
 # Load / Save
 # -----------------------------
 
+def _fresh_memory(project_id):
+    return {
+        "memory_version": MEMORY_VERSION,
+        "project_id": project_id,
+        "last_updated_period": None,
+        "period_table": PeriodTable(),
+        "risks": {}
+    }
+
+
 def load_memory(project_id=DEFAULT_PROJECT_ID):
+    """
+    Returns project memory, served from the in-process cache while the
+    stored copy is unchanged (same file mtime/size stamp).
+
+    The returned dict is shared with other callers: treat it as read-only.
+    Writers go through update_memory / update_memory_many.
+    """
+    stamp = _memory_stamp(project_id)
+
+    with _memory_cache_lock:
+        cached = _memory_cache.get(project_id)
+        if cached and cached[0] == (MEMORY_BACKEND, stamp):
+            return cached[1]
+
+    memory = _load_memory_uncached(project_id)
+    _cache_memory(project_id, memory, stamp)
+    return memory
+
+
+def _load_memory_uncached(project_id):
+    with span("memory_load", backend=MEMORY_BACKEND):
+        return _read_memory(project_id)
+
+
+def _read_memory(project_id):
+    if MEMORY_BACKEND == "sqlite":
+        memory = memory_sqlite.load_project(project_id)
+        return memory if memory is not None else _fresh_memory(project_id)
+
+    if MEMORY_BACKEND == "eventlog":
+        memory = memory_eventlog.load_project(project_id)
+        return memory if memory is not None else _fresh_memory(project_id)
+
     ensure_memory_dir()
     path = memory_file_path(project_id)
 
     # Fresh memory
     if not os.path.exists(path):
-        return {
-            "memory_version": MEMORY_VERSION,
-            "project_id": project_id,
-            "last_updated_period": None,
-            "risks": {}
-        }
+        return _fresh_memory(project_id)
+
+    return load_memory_file(path, project_id)
+
+
+def load_memory_file(path, project_id=DEFAULT_PROJECT_ID):
+    """
+    Reads a JSON memory file. Files stamped with an older memory_version
+    are migrated once and written back, so later loads take the fast path.
+    Risk histories stay encoded until first read (see risk_history).
+    """
+    stamp = _file_stamp(path)
 
     with open(path, "r") as f:
         memory = json.load(f)
 
-    # -----------------------------
-    # Backward Compatibility Layer
-    # -----------------------------
-
-    for risk in memory.get("risks", {}).values():
-
-        # periods_seen introduced later
-        if "periods_seen" not in risk:
-            last_seen = risk.get("last_seen_period")
-            risk["periods_seen"] = [last_seen] if last_seen else []
-
-        # periods_open introduced later
-        if "periods_open" not in risk:
-            risk["periods_open"] = len(risk["periods_seen"])
-
-        # confidence introduced in v1.3
-        if "confidence" not in risk:
-            risk["confidence"] = {
-                "level": "High",
-                "absence_count": 0,
-                "last_confident_period": risk.get("last_seen_period")
-            }
-
-        # resolution structure normalization
-        if "resolution" not in risk:
-            risk["resolution"] = {
-                "is_resolved": False,
-                "resolved_period": None,
-                "resolution_reason": None
-            }
-
-    memory["memory_version"] = MEMORY_VERSION
-    return memory
+    if migrate_memory(memory, MEMORY_VERSION):
+        with file_lock(memory_lock_path(project_id)):
+            # Skip the write-back if a writer replaced the file meanwhile
+            if _file_stamp(path) == stamp:
+                _write_memory_file(path, memory)
+
+    return decode_memory(memory)
+
+
+def _write_memory_file(path, memory):
+    """Write-to-temp + atomic rename: readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(memory, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_memory(memory, project_id=DEFAULT_PROJECT_ID, events=None,
+                expected_revision=None):
+    """
+    Persists memory under the project's advisory file lock and bumps
+    memory["revision"].
+
+    expected_revision: revision the caller loaded; if the stored revision
+    differs, another writer committed first and MemoryConflictError is
+    raised instead of overwriting their update.
+
+    events (see apply_memory_event) are the changes since the last save;
+    the event-log backend appends only those, other backends persist the
+    full state.
+    """
+    ensure_memory_dir()
 
+    with file_lock(memory_lock_path(project_id)):
+        stored_revision = _stored_revision(project_id)
 
-def save_memory(memory, project_id=DEFAULT_PROJECT_ID):
-    path = memory_file_path(project_id)
-    with open(path, "w") as f:
-        json.dump(memory, f, indent=2)
+        if expected_revision is not None and stored_revision != expected_revision:
+            raise MemoryConflictError(
+                f"Memory for project '{project_id}' is at revision "
+                f"{stored_revision}, expected {expected_revision}"
+            )
+
+        memory["revision"] = stored_revision + 1
+
+        with span("memory_save", backend=MEMORY_BACKEND):
+            try:
+                if MEMORY_BACKEND == "sqlite":
+                    # Only the risks the events touched are written
+                    memory_sqlite.save_project(
+                        memory, project_id, risk_ids=_touched_risks(events)
+                    )
+
+                elif MEMORY_BACKEND == "eventlog":
+                    if events is None:
+                        memory_eventlog.replace_project(memory, project_id)
+                    else:
+                        memory_eventlog.append_events(
+                            events, project_id, revision=memory["revision"]
+                        )
+
+                else:
+                    _write_memory_file(
+                        memory_file_path(project_id), encode_memory(memory)
+                    )
+
+            except Exception:
+                invalidate_memory_cache(project_id)
+                raise
+
+        # Stamp taken under the lock, so it belongs to this write
+        _cache_memory(project_id, memory, _memory_stamp(project_id))
+
+    update_portfolio_index(memory, project_id)
+
+
+def _touched_risks(events):
+    """Risk ids changed by events, or None (unknown: write everything)."""
+    if events is None:
+        return None
+    return list(dict.fromkeys(
+        event["risk_id"] for event in events if "risk_id" in event
+    ))
+
+
+def _stored_revision(project_id):
+    if MEMORY_BACKEND == "sqlite":
+        return memory_sqlite.load_revision(project_id)
+    # Stamp-cached: no parse unless another writer changed the file
+    return load_memory(project_id).get("revision", 0)
+
+
+# -----------------------------
+# In-process Memory Cache
+# -----------------------------
+
+def _memory_stamp(project_id):
+    """Cheap change detector for the stored copy (no parsing)."""
+    if MEMORY_BACKEND == "sqlite":
+        return memory_sqlite.project_stamp(project_id)
+    if MEMORY_BACKEND == "eventlog":
+        return memory_eventlog.project_stamp(project_id)
+    return _file_stamp(memory_file_path(project_id))
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_for_update(project_id):
+    """
+    Private copy of memory for a read-modify-write: copied from the cache
+    while its stamp still matches (a writer's own last save), so a write
+    does not re-read the project's whole history; else loaded.
+    """
+    stamp = _memory_stamp(project_id)
+
+    with _memory_cache_lock:
+        cached = _memory_cache.get(project_id)
+
+    if cached and cached[0] == (MEMORY_BACKEND, stamp):
+        return copy_memory(cached[1])
+
+    return _load_memory_uncached(project_id)
+
+
+def _cache_memory(project_id, memory, stamp):
+    with _memory_cache_lock:
+        _memory_cache[project_id] = ((MEMORY_BACKEND, stamp), memory)
+
+
+def invalidate_memory_cache(project_id=None):
+    with _memory_cache_lock:
+        if project_id is None:
+            _memory_cache.clear()
+        else:
+            _memory_cache.pop(project_id, None)
+
+
+# -----------------------------
+# Portfolio Index
+# -----------------------------
+#
+# memory/portfolio_index.json keeps one small summary per project, so a
+# portfolio overview does not have to open every project's memory.
+
+def portfolio_index_path():
+    return os.path.join(MEMORY_DIR, "portfolio_index.json")
+
+
+def portfolio_entry(memory):
+    active = [
+        risk for risk in memory.get("risks", {}).values()
+        if not risk["resolution"]["is_resolved"]
+    ]
+
+    max_heat = max(
+        (heat for heat in map(last_heat, active) if heat),
+        key=_heat_rank,
+        default=None
+    )
+
+    return {
+        "project_id": memory.get("project_id"),
+        "last_updated_period": memory.get("last_updated_period"),
+        "active_risk_count": len(active),
+        "max_heat": max_heat,
+        "revision": memory.get("revision", 0),
+    }
+
+
+def load_portfolio_index():
+    """Returns {project_id: portfolio entry}."""
+    path = portfolio_index_path()
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r") as f:
+        return json.load(f).get("projects", {})
+
+
+def update_portfolio_index(memory, project_id=DEFAULT_PROJECT_ID):
+    entry = portfolio_entry(memory)
+    entry["project_id"] = project_id
+
+    try:
+        with file_lock(os.path.join(MEMORY_DIR, "portfolio_index.lock")):
+            projects = load_portfolio_index()
+
+            # Never let a slower writer roll an entry back
+            current = projects.get(project_id)
+            if current and current.get("revision", 0) > entry["revision"]:
+                return
+
+            projects[project_id] = entry
+            _write_memory_file(portfolio_index_path(), {"projects": projects})
+
+    except (OSError, ValueError):
+        pass  # Derived data; rebuild_portfolio_index() restores it
+
+
+def list_projects():
+    """Project ids with stored memory in the active backend."""
+    if MEMORY_BACKEND == "sqlite":
+        return memory_sqlite.list_projects()
+    if MEMORY_BACKEND == "eventlog":
+        return memory_eventlog.list_projects()
+
+    projects = []
+    for path in sorted(glob.glob(os.path.join(MEMORY_DIR, "project_*.json"))):
+        name = os.path.basename(path)
+        if not name.endswith(".snapshot.json"):
+            projects.append(name[len("project_"):-len(".json")])
+    return projects
+
+
+def rebuild_portfolio_index(project_ids=None):
+    """Recomputes the index from stored memory (all projects by default)."""
+    if project_ids is None:
+        project_ids = list_projects()
+
+    projects = {}
+    for project_id in project_ids:
+        entry = portfolio_entry(load_memory(project_id))
+        entry["project_id"] = project_id
+        projects[project_id] = entry
+
+    ensure_memory_dir()
+    with file_lock(os.path.join(MEMORY_DIR, "portfolio_index.lock")):
+        _write_memory_file(portfolio_index_path(), {"projects": projects})
+
+    return projects
+
+
+# -----------------------------
+# Comparison State
+# -----------------------------
+#
+# memory/comparison_<id>.json holds the project's incremental comparison
+# state (comparison_service.ComparisonAccumulator) next to its memory.
+
+def comparison_state_path(project_id=DEFAULT_PROJECT_ID):
+    return os.path.join(MEMORY_DIR, f"comparison_{project_id}.json")
+
+
+def load_comparison_state(project_id=DEFAULT_PROJECT_ID):
+    """Stored comparison state, or None before the first recorded update."""
+    path = comparison_state_path(project_id)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def update_comparison_state(project_id, apply_changes):
+    """
+    Read-modify-write of the comparison state under the project's lock.
+    apply_changes(state or None) returns (new_state, value); value is
+    passed back to the caller.
+    """
+    ensure_memory_dir()
+
+    with file_lock(memory_lock_path(project_id)):
+        state, value = apply_changes(load_comparison_state(project_id))
+        _write_memory_file(comparison_state_path(project_id), state)
+
+    return value
 
 
 # -----------------------------
@@ -105,10 +440,75 @@ def save_memory(memory, project_id=DEFAULT_PROJECT_ID):
 # -----------------------------
 
 def update_memory(analyzed_result, project_id=DEFAULT_PROJECT_ID, period_id=None):
-    memory = load_memory(project_id)
     period = normalize_period(period_id)
 
-    memory["last_updated_period"] = period
+    return _commit(
+        project_id,
+        lambda memory: apply_period(memory, analyzed_result, period)
+    )
+
+
+def update_memory_many(results_with_periods, project_id=DEFAULT_PROJECT_ID):
+    """
+    Applies an ordered batch of (analyzed_result, period_id) pairs with a
+    single load and a single durable write. Equivalent to calling
+    update_memory for each pair in order.
+    """
+    results_with_periods = list(results_with_periods)
+
+    def apply_all(memory):
+        events = []
+        for analyzed_result, period_id in results_with_periods:
+            events.extend(
+                apply_period(memory, analyzed_result, normalize_period(period_id))
+            )
+        return events
+
+    return _commit(project_id, apply_all)
+
+
+def _commit(project_id, apply_changes):
+    """
+    Read-modify-write of one project's memory: load a private copy, apply
+    changes (a function returning memory events), save against the loaded
+    revision.
+
+    The project's advisory lock is held throughout, so writers serialize
+    per project. The revision check still catches writers the lock cannot
+    exclude (e.g. storage without flock support); on conflict the update
+    is re-applied on top of the winner after a short jittered backoff.
+    """
+    for attempt in range(MEMORY_WRITE_RETRIES + 1):
+        with file_lock(memory_lock_path(project_id)):
+            # Private copy: cached memory may be shared with readers
+            memory = _load_for_update(project_id)
+            loaded_revision = memory.get("revision", 0)
+
+            events = apply_changes(memory)
+
+            try:
+                save_memory(
+                    memory,
+                    project_id,
+                    events=events,
+                    expected_revision=loaded_revision
+                )
+                return memory
+            except MemoryConflictError:
+                if attempt >= MEMORY_WRITE_RETRIES:
+                    raise
+
+        time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+
+
+def apply_period(memory, analyzed_result, period):
+    """
+    Folds one analyzed update into memory (in place).
+    Returns the list of memory events describing every change made.
+    """
+    events = []
+
+    _record_event(memory, events, {"type": "period", "period": period})
     risks_seen_this_period = set()
 
     for risk in analyzed_result.get("risks", []):
@@ -116,32 +516,122 @@ def update_memory(analyzed_result, project_id=DEFAULT_PROJECT_ID, period_id=None
         risks_seen_this_period.add(risk_id)
 
         if risk_id not in memory["risks"]:
-            memory["risks"][risk_id] = _create_new_risk_record(risk, period)
+            _record_event(memory, events, _observed_event(risk, period))
         else:
-            _update_existing_risk(memory["risks"][risk_id], risk, period)
+            _update_existing_risk(memory, events, memory["risks"][risk_id], risk, period)
 
-    _handle_missing_risks(memory["risks"], risks_seen_this_period, period)
+    _handle_missing_risks(memory, events, risks_seen_this_period, period)
 
-    save_memory(memory, project_id)
-    return memory
+    return events
+
+
+# -----------------------------
+# Memory Events
+# -----------------------------
+#
+# Every change to memory is expressed as an event and applied through
+# apply_memory_event, so a state can be rebuilt from a snapshot plus the
+# events recorded after it:
+#
+#   period       → last_updated_period advanced
+#   observed     → risk seen this period (creates the record if new)
+#   escalated    → heat rose vs. previous observation
+#   de_escalated → heat fell vs. previous observation
+#   recurred     → previously resolved risk observed again
+#   decayed      → confidence decayed after an absence
+#   resolved     → resolved after sustained low-confidence absence
+
+def _record_event(memory, events, event):
+    apply_memory_event(memory, event)
+    events.append(event)
+
+
+def _observed_event(risk, period):
+    return {
+        "type": "observed",
+        "risk_id": risk["risk_id"],
+        "category": risk["category"],
+        "period": period,
+        "risk_heat": risk["risk_heat"],
+        "attention_level": risk["attention_level"],
+    }
+
+
+def apply_memory_event(memory, event):
+    kind = event["type"]
+
+    if kind == "period":
+        memory["last_updated_period"] = event["period"]
+        return
+
+    risk_id = event["risk_id"]
+    record = memory["risks"].get(risk_id)
+
+    if kind == "observed":
+        if record is None:
+            memory["risks"][risk_id] = _create_new_risk_record(memory, event, event["period"])
+            return
+
+        period = event["period"]
+        record_observation(
+            memory, record, period, event["risk_heat"], event["attention_level"]
+        )
+        record["periods_open"] += 1
+        record["last_seen_period"] = period
+
+        # Reset confidence on observation
+        record["confidence"]["level"] = "High"
+        record["confidence"]["absence_count"] = 0
+        record["confidence"]["last_confident_period"] = period
+
+        record["current_status"] = "Stable"
+
+    elif kind == "escalated":
+        record["escalation_count"] += 1
+        record["current_status"] = "Escalated"
+
+    elif kind == "de_escalated":
+        record["de_escalation_count"] += 1
+        record["current_status"] = "De-escalated"
+
+    elif kind == "recurred":
+        record["recurrence_count"] += 1
+        record["resolution"]["is_resolved"] = False
+        record["resolution"]["resolved_period"] = None
+        record["resolution"]["resolution_reason"] = None
+        record["current_status"] = "Recurring"
+
+    elif kind == "decayed":
+        record["confidence"]["absence_count"] = event["absence_count"]
+        record["confidence"]["level"] = event["confidence_level"]
+
+    elif kind == "resolved":
+        record["resolution"]["is_resolved"] = True
+        record["resolution"]["resolved_period"] = event["period"]
+        record["resolution"]["resolution_reason"] = event["resolution_reason"]
+        record["current_status"] = "Resolved"
+
+    else:
+        raise ValueError(f"Unknown memory event type: {kind}")
 
 
 # -----------------------------
 # Risk Record Handlers
 # -----------------------------
 
-def _create_new_risk_record(risk, period):
+def _create_new_risk_record(memory, risk, period):
     return {
         "risk_id": risk["risk_id"],
         "category": risk["category"],
 
         "first_seen_period": period,
         "last_seen_period": period,
-        "periods_seen": [period],
         "periods_open": 1,
 
-        "heat_history": [risk["risk_heat"]],
-        "attention_history": [risk["attention_level"]],
+        # periods seen / heat / attention per observation
+        "history": new_history(
+            memory, period, risk["risk_heat"], risk["attention_level"]
+        ),
 
         "escalation_count": 0,
         "de_escalation_count": 0,
@@ -163,49 +653,33 @@ def _create_new_risk_record(risk, period):
     }
 
 
-def _update_existing_risk(record, risk, period):
+def _update_existing_risk(memory, events, record, risk, period):
     # Ignore duplicate updates in same period
-    if period in record["periods_seen"]:
+    if seen_in(memory, record, period):
         return
 
-    prev_heat = record["heat_history"][-1]
+    risk_id = record["risk_id"]
+    prev_heat = last_heat(record)
     curr_heat = risk["risk_heat"]
 
-    record["periods_seen"].append(period)
-    record["periods_open"] += 1
-    record["last_seen_period"] = period
-    record["heat_history"].append(curr_heat)
-    record["attention_history"].append(risk["attention_level"])
-
-    # Reset confidence on observation
-    record["confidence"]["level"] = "High"
-    record["confidence"]["absence_count"] = 0
-    record["confidence"]["last_confident_period"] = period
+    _record_event(memory, events, _observed_event(risk, period))
 
     if _heat_rank(curr_heat) > _heat_rank(prev_heat):
-        record["escalation_count"] += 1
-        record["current_status"] = "Escalated"
+        _record_event(memory, events, {"type": "escalated", "risk_id": risk_id})
     elif _heat_rank(curr_heat) < _heat_rank(prev_heat):
-        record["de_escalation_count"] += 1
-        record["current_status"] = "De-escalated"
-    else:
-        record["current_status"] = "Stable"
+        _record_event(memory, events, {"type": "de_escalated", "risk_id": risk_id})
 
     # Recurrence handling
     if record["resolution"]["is_resolved"]:
-        record["recurrence_count"] += 1
-        record["resolution"]["is_resolved"] = False
-        record["resolution"]["resolved_period"] = None
-        record["resolution"]["resolution_reason"] = None
-        record["current_status"] = "Recurring"
+        _record_event(memory, events, {"type": "recurred", "risk_id": risk_id})
 
 
 # -----------------------------
 # Absence / Decay Logic (v1.3)
 # -----------------------------
 
-def _handle_missing_risks(risks, seen_ids, period):
-    for risk_id, record in risks.items():
+def _handle_missing_risks(memory, events, seen_ids, period):
+    for risk_id, record in list(memory["risks"].items()):
 
         if risk_id in seen_ids:
             continue
@@ -213,44 +687,55 @@ def _handle_missing_risks(risks, seen_ids, period):
         if record["resolution"]["is_resolved"]:
             continue
 
-        record["confidence"]["absence_count"] += 1
-        absence = record["confidence"]["absence_count"]
-        severity = record["heat_history"][-1]
+        absence = record["confidence"]["absence_count"] + 1
+        severity = last_heat(record)
+
+        level = _apply_confidence_decay(
+            record["confidence"]["level"], severity, absence
+        )
 
-        _apply_confidence_decay(record, severity, absence)
+        _record_event(memory, events, {
+            "type": "decayed",
+            "risk_id": risk_id,
+            "absence_count": absence,
+            "confidence_level": level,
+        })
 
         # Resolution now confidence-based
         if (
-            record["confidence"]["level"] == "Low"
+            level == "Low"
             and absence >= RESOLUTION_ABSENCE_THRESHOLD
         ):
-            record["resolution"]["is_resolved"] = True
-            record["resolution"]["resolved_period"] = period
-            record["resolution"]["resolution_reason"] = (
-                "Confidence decayed after sustained absence"
-            )
-            record["current_status"] = "Resolved"
+            _record_event(memory, events, {
+                "type": "resolved",
+                "risk_id": risk_id,
+                "period": period,
+                "resolution_reason": "Confidence decayed after sustained absence",
+            })
 
 
-def _apply_confidence_decay(record, severity, absence):
+def _apply_confidence_decay(level, severity, absence):
+    """Returns the confidence level after `absence` consecutive misses."""
 
     if severity == "High":
         if absence >= 5:
-            record["confidence"]["level"] = "Low"
+            level = "Low"
         elif absence >= 3:
-            record["confidence"]["level"] = "Medium"
+            level = "Medium"
 
     elif severity == "Medium":
         if absence >= 4:
-            record["confidence"]["level"] = "Low"
+            level = "Low"
         elif absence >= 2:
-            record["confidence"]["level"] = "Medium"
+            level = "Medium"
 
     else:  # Low severity
         if absence >= 3:
-            record["confidence"]["level"] = "Low"
+            level = "Low"
         elif absence >= 1:
-            record["confidence"]["level"] = "Medium"
+            level = "Medium"
+
+    return level
 
 
 # -----------------------------
@@ -0,0 +1,507 @@
+"""
+memory_sqlite.py
+
+SQLite storage backend for longitudinal memory.
+One row per risk, plus indexed period / heat history tables, so a save
+touches only the rows that changed and appends only new history entries.
+
+The database lives in memory_service.MEMORY_DIR (memory.db) unless
+GPMOID_MEMORY_DB points elsewhere.
+
+Migration from the JSON files:
+    python -m services.memory_sqlite memory/ memory/memory.db
+"""
+
+import os
+import glob
+import sqlite3
+import argparse
+
+from services.risk_history import (
+    PeriodTable,
+    RiskHistory,
+    attention_history,
+    heat_history,
+    history_of,
+    periods_seen,
+)
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+# Explicit database path; None → memory.db in memory_service.MEMORY_DIR
+MEMORY_DB_PATH = os.getenv("GPMOID_MEMORY_DB") or None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id          TEXT PRIMARY KEY,
+    memory_version      TEXT NOT NULL,
+    last_updated_period TEXT,
+    revision            INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS risks (
+    project_id            TEXT NOT NULL,
+    risk_id               TEXT NOT NULL,
+    category              TEXT,
+    first_seen_period     TEXT,
+    last_seen_period      TEXT,
+    periods_open          INTEGER NOT NULL DEFAULT 0,
+    escalation_count      INTEGER NOT NULL DEFAULT 0,
+    de_escalation_count   INTEGER NOT NULL DEFAULT 0,
+    recurrence_count      INTEGER NOT NULL DEFAULT 0,
+    current_status        TEXT,
+    confidence_level      TEXT,
+    absence_count         INTEGER NOT NULL DEFAULT 0,
+    last_confident_period TEXT,
+    is_resolved           INTEGER NOT NULL DEFAULT 0,
+    resolved_period       TEXT,
+    resolution_reason     TEXT,
+    periods_count         INTEGER NOT NULL DEFAULT 0,
+    heat_count            INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, risk_id)
+);
+
+CREATE TABLE IF NOT EXISTS risk_periods (
+    project_id TEXT NOT NULL,
+    risk_id    TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    period     TEXT NOT NULL,
+    PRIMARY KEY (project_id, risk_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_risk_periods_period
+    ON risk_periods (project_id, period);
+
+CREATE TABLE IF NOT EXISTS risk_heat_history (
+    project_id      TEXT NOT NULL,
+    risk_id         TEXT NOT NULL,
+    seq             INTEGER NOT NULL,
+    risk_heat       TEXT,
+    attention_level TEXT,
+    PRIMARY KEY (project_id, risk_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_risk_heat_history_heat
+    ON risk_heat_history (project_id, risk_heat);
+"""
+
+RISK_COLUMNS = [
+    "category",
+    "first_seen_period",
+    "last_seen_period",
+    "periods_open",
+    "escalation_count",
+    "de_escalation_count",
+    "recurrence_count",
+    "current_status",
+    "confidence_level",
+    "absence_count",
+    "last_confident_period",
+    "is_resolved",
+    "resolved_period",
+    "resolution_reason",
+    "periods_count",
+    "heat_count",
+]
+
+
+# -----------------------------
+# Connection
+# -----------------------------
+
+def default_db_path():
+    if MEMORY_DB_PATH:
+        return MEMORY_DB_PATH
+
+    # Shares memory_service.MEMORY_DIR (imported lazily: it imports us)
+    from services.memory_service import MEMORY_DIR
+    return os.path.join(MEMORY_DIR, "memory.db")
+
+
+# Databases whose schema this process has already ensured
+_initialized = set()
+
+
+def connect(db_path=None):
+    db_path = db_path or default_db_path()
+
+    db_dir = os.path.dirname(db_path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+
+    key = os.path.abspath(db_path)
+    initialized = key in _initialized and os.path.exists(db_path)
+
+    # Autocommit mode; write transactions are opened explicitly
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    if not initialized:
+        conn.execute("PRAGMA journal_mode=WAL")  # persistent per database
+        conn.executescript(SCHEMA)
+
+        # revision added after the first release of this schema
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(projects)")}
+        if "revision" not in columns:
+            conn.execute(
+                "ALTER TABLE projects ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"
+            )
+
+        _initialized.add(key)
+
+    return conn
+
+
+def project_stamp(project_id, db_path=None):
+    """
+    Change detector for cache invalidation: the project's stored revision
+    (bumped by every save), so writes to other projects leave it intact.
+    """
+    db_path = db_path or default_db_path()
+    return (os.path.abspath(db_path), load_revision(project_id, db_path))
+
+
+# -----------------------------
+# Load
+# -----------------------------
+
+def list_projects(db_path=None):
+    conn = connect(db_path)
+    try:
+        return [
+            row[0] for row in
+            conn.execute("SELECT project_id FROM projects ORDER BY project_id")
+        ]
+    finally:
+        conn.close()
+
+
+def load_revision(project_id, db_path=None):
+    """Stored revision of project_id (0 if never saved)."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT revision FROM projects WHERE project_id = ?",
+            (project_id,)
+        ).fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+
+def load_project(project_id, db_path=None):
+    """
+    Returns the memory dict for project_id (same shape as the JSON file),
+    or None if the project has never been saved.
+    """
+    conn = connect(db_path)
+    try:
+        # One read transaction: a consistent snapshot across all tables
+        conn.execute("BEGIN")
+
+        row = conn.execute(
+            "SELECT memory_version, last_updated_period, revision "
+            "FROM projects WHERE project_id = ?",
+            (project_id,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        memory = {
+            "memory_version": row[0],
+            "project_id": project_id,
+            "last_updated_period": row[1],
+            "revision": row[2],
+            "risks": {}
+        }
+
+        columns = ", ".join(["risk_id"] + RISK_COLUMNS)
+        for values in conn.execute(
+            f"SELECT {columns} FROM risks WHERE project_id = ?",
+            (project_id,)
+        ):
+            risk_id = values[0]
+            memory["risks"][risk_id] = _row_to_record(
+                risk_id, dict(zip(RISK_COLUMNS, values[1:]))
+            )
+
+        # risk_id → (periods, heats, attentions) as stored
+        lists = {risk_id: ([], [], []) for risk_id in memory["risks"]}
+
+        for risk_id, period in conn.execute(
+            "SELECT risk_id, period FROM risk_periods "
+            "WHERE project_id = ? ORDER BY risk_id, seq",
+            (project_id,)
+        ):
+            lists[risk_id][0].append(period)
+
+        for risk_id, heat, attention in conn.execute(
+            "SELECT risk_id, risk_heat, attention_level FROM risk_heat_history "
+            "WHERE project_id = ? ORDER BY risk_id, seq",
+            (project_id,)
+        ):
+            _, heats, attentions = lists[risk_id]
+            if heat is not None:
+                heats.append(heat)
+            if attention is not None:
+                attentions.append(attention)
+
+        table = memory["period_table"] = PeriodTable(sorted({
+            period for periods, _, _ in lists.values() for period in periods
+        }))
+        for risk_id, (periods, heats, attentions) in lists.items():
+            memory["risks"][risk_id]["history"] = RiskHistory.from_lists(
+                table, periods, heats, attentions
+            )
+
+        return memory
+
+    finally:
+        conn.close()  # ends the read transaction
+
+
+def _row_to_record(risk_id, row):
+    return {
+        "risk_id": risk_id,
+        "category": row["category"],
+
+        "first_seen_period": row["first_seen_period"],
+        "last_seen_period": row["last_seen_period"],
+        "periods_open": row["periods_open"],
+
+        "history": None,  # filled by load_project
+
+        "escalation_count": row["escalation_count"],
+        "de_escalation_count": row["de_escalation_count"],
+        "recurrence_count": row["recurrence_count"],
+
+        "current_status": row["current_status"],
+
+        "confidence": {
+            "level": row["confidence_level"],
+            "absence_count": row["absence_count"],
+            "last_confident_period": row["last_confident_period"]
+        },
+
+        "resolution": {
+            "is_resolved": bool(row["is_resolved"]),
+            "resolved_period": row["resolved_period"],
+            "resolution_reason": row["resolution_reason"]
+        }
+    }
+
+
+# -----------------------------
+# Save
+# -----------------------------
+
+def save_project(memory, project_id, db_path=None, risk_ids=None):
+    """
+    Persists memory in a single transaction.
+    Risk rows are upserted; history tables only receive new entries.
+
+    risk_ids: the risks changed since the last save (e.g. from the applied
+    memory events); only those rows are written. None → every risk, and
+    rows of risks no longer in memory are deleted.
+    """
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+
+        conn.execute(
+            "INSERT INTO projects "
+            "(project_id, memory_version, last_updated_period, revision) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (project_id) DO UPDATE SET "
+            "memory_version = excluded.memory_version, "
+            "last_updated_period = excluded.last_updated_period, "
+            "revision = excluded.revision",
+            (
+                project_id,
+                memory["memory_version"],
+                memory["last_updated_period"],
+                memory.get("revision", 0)
+            )
+        )
+
+        if risk_ids is None:
+            stored = _stored_counts(conn, project_id)
+            changed = memory["risks"]
+        else:
+            stored = _stored_counts(conn, project_id, risk_ids)
+            changed = [risk_id for risk_id in risk_ids if risk_id in memory["risks"]]
+
+        for risk_id in changed:
+            record = memory["risks"][risk_id]
+            _upsert_risk(conn, project_id, memory, risk_id, record, stored.get(risk_id))
+
+        if risk_ids is None:
+            for risk_id in set(stored) - set(memory["risks"]):
+                _delete_risk(conn, project_id, risk_id)
+
+        conn.execute("COMMIT")
+
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+    finally:
+        conn.close()
+
+
+def _stored_counts(conn, project_id, risk_ids=None):
+    """{risk_id: (periods_count, heat_count)} of stored risks (all, or risk_ids)."""
+    query = "SELECT risk_id, periods_count, heat_count FROM risks WHERE project_id = ?"
+
+    if risk_ids is None:
+        rows = conn.execute(query, (project_id,))
+    else:
+        rows = (
+            row
+            for risk_id in risk_ids
+            for row in conn.execute(query + " AND risk_id = ?", (project_id, risk_id))
+        )
+
+    return {risk_id: (periods, heats) for risk_id, periods, heats in rows}
+
+
+def _upsert_risk(conn, project_id, memory, risk_id, record, stored_counts):
+    history = history_of(record)
+    periods_count = len(history.periods)
+    heat_count = max(len(history.heat), len(history.attention))
+
+    confidence = record.get("confidence", {})
+    resolution = record.get("resolution", {})
+
+    row = {
+        "category": record.get("category"),
+        "first_seen_period": record.get("first_seen_period"),
+        "last_seen_period": record.get("last_seen_period"),
+        "periods_open": record.get("periods_open", periods_count),
+        "escalation_count": record.get("escalation_count", 0),
+        "de_escalation_count": record.get("de_escalation_count", 0),
+        "recurrence_count": record.get("recurrence_count", 0),
+        "current_status": record.get("current_status"),
+        "confidence_level": confidence.get("level"),
+        "absence_count": confidence.get("absence_count", 0),
+        "last_confident_period": confidence.get("last_confident_period"),
+        "is_resolved": int(bool(resolution.get("is_resolved"))),
+        "resolved_period": resolution.get("resolved_period"),
+        "resolution_reason": resolution.get("resolution_reason"),
+        "periods_count": periods_count,
+        "heat_count": heat_count,
+    }
+
+    columns = ", ".join(["project_id", "risk_id"] + RISK_COLUMNS)
+    placeholders = ", ".join("?" for _ in range(len(RISK_COLUMNS) + 2))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in RISK_COLUMNS)
+
+    conn.execute(
+        f"INSERT INTO risks ({columns}) VALUES ({placeholders}) "
+        f"ON CONFLICT (project_id, risk_id) DO UPDATE SET {updates}",
+        [project_id, risk_id] + [row[c] for c in RISK_COLUMNS]
+    )
+
+    old_periods, old_heat = stored_counts or (0, 0)
+
+    # History is append-only; rewrite only if it somehow shrank
+    if periods_count < old_periods:
+        conn.execute(
+            "DELETE FROM risk_periods WHERE project_id = ? AND risk_id = ?",
+            (project_id, risk_id)
+        )
+        old_periods = 0
+
+    if heat_count < old_heat:
+        conn.execute(
+            "DELETE FROM risk_heat_history WHERE project_id = ? AND risk_id = ?",
+            (project_id, risk_id)
+        )
+        old_heat = 0
+
+    # Only the tail past the stored counts is converted back to labels
+    periods = periods_seen(memory, record, old_periods)
+    heats = heat_history(record, old_heat)
+    attentions = attention_history(record, old_heat)
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO risk_periods (project_id, risk_id, seq, period) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (project_id, risk_id, old_periods + i, period)
+            for i, period in enumerate(periods)
+        ]
+    )
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO risk_heat_history "
+        "(project_id, risk_id, seq, risk_heat, attention_level) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (
+                project_id,
+                risk_id,
+                old_heat + i,
+                heats[i] if i < len(heats) else None,
+                attentions[i] if i < len(attentions) else None,
+            )
+            for i in range(heat_count - old_heat)
+        ]
+    )
+
+
+def _delete_risk(conn, project_id, risk_id):
+    for table in ("risks", "risk_periods", "risk_heat_history"):
+        conn.execute(
+            f"DELETE FROM {table} WHERE project_id = ? AND risk_id = ?",
+            (project_id, risk_id)
+        )
+
+
+# -----------------------------
+# JSON → SQLite Migration
+# -----------------------------
+
+def migrate_json_to_sqlite(memory_dir="memory", db_path=None):
+    """
+    Imports every memory/project_<id>.json file into the SQLite store
+    (default: GPMOID_MEMORY_DB, else memory.db in memory_dir).
+    Returns the list of migrated project ids.
+    """
+    from services.memory_service import load_memory_file
+
+    db_path = db_path or MEMORY_DB_PATH or os.path.join(memory_dir, "memory.db")
+    migrated = []
+    pattern = os.path.join(memory_dir, "project_*.json")
+
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(".snapshot.json"):
+            continue  # event-log snapshot, not a JSON-backend file
+
+        project_id = os.path.basename(path)[len("project_"):-len(".json")]
+        memory = load_memory_file(path, project_id)
+        save_project(memory, project_id, db_path)
+        migrated.append(project_id)
+
+    return migrated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migrate JSON project memory files into SQLite."
+    )
+    parser.add_argument("memory_dir", nargs="?", default="memory")
+    parser.add_argument("db_path", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    migrated = migrate_json_to_sqlite(args.memory_dir, args.db_path)
+    print(f"Migrated {len(migrated)} project(s): {', '.join(migrated) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+metrics.py
+
+Per-stage latency instrumentation for the analysis pipeline.
+
+span(stage) times one stage of one request and records it in an
+in-process histogram per stage:
+
+    prompt_build, llm_call, json_parse, normalization,
+    memory_load, memory_save, comparison
+
+Every span carries the request's correlation id (request_context), so
+the stages of one update can be followed end to end.
+
+Export:
+- GPMOID_METRICS_FILE=path  → one JSON line per span (request_id, stage,
+  duration_s, ok, ...)
+- GPMOID_METRICS_PORT=port  → Prometheus text endpoint (/metrics), see
+  start_metrics_server()
+- GPMOID_METRICS=off        → disable recording
+
+Summarize a metrics file (count / p50 / p95 / max per stage):
+    python -m services.metrics metrics.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+METRICS_FILE = os.getenv("GPMOID_METRICS_FILE")
+METRICS_PORT = os.getenv("GPMOID_METRICS_PORT")
+
+# Histogram bucket upper bounds, seconds (+Inf implied)
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+    0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+METRIC_NAME = "gpmoid_stage_duration_seconds"
+
+
+def metrics_enabled():
+    return os.getenv("GPMOID_METRICS", "on").lower() not in ("off", "0", "false")
+
+
+# -----------------------------
+# Correlation IDs
+# -----------------------------
+
+_request_id = contextvars.ContextVar("gpmoid_request_id", default=None)
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id=None):
+    """
+    Tags every span in the block with one correlation id: the given one,
+    else the enclosing request's, else a new one. Yields the id.
+    """
+    request_id = request_id or current_request_id() or new_request_id()
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        try:
+            _request_id.reset(token)
+        except ValueError:
+            pass  # generator finalized from another context; nothing to restore
+
+
+# -----------------------------
+# Histograms
+# -----------------------------
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(le, cumulative count)], ending with ("+Inf", count)."""
+        total = 0
+        rows = []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+_file_lock = threading.Lock()
+
+# Span list of an active capture_spans block
+_captured = contextvars.ContextVar("gpmoid_captured_spans", default=None)
+
+
+def observe(stage, duration, ok=True, **fields):
+    """Records one finished stage (histogram + optional JSONL line)."""
+    if not metrics_enabled():
+        return
+
+    captured = _captured.get()
+    if captured is not None:
+        captured.append((stage, duration, ok, fields))
+        return
+
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(duration)
+
+    if METRICS_FILE:
+        record = {
+            "ts": round(time.time(), 6),
+            "request_id": current_request_id(),
+            "stage": stage,
+            "duration_s": round(duration, 6),
+            "ok": ok,
+        }
+        record.update(fields)
+
+        try:
+            with _file_lock, open(METRICS_FILE, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass  # Metrics are best-effort
+
+
+@contextmanager
+def span(stage, **fields):
+    """
+    Times the block as one `stage` of the current request.
+    Extra fields are written to the JSONL record only (not histogram labels).
+    """
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, ok=ok, **fields)
+
+
+@contextmanager
+def capture_spans():
+    """
+    Collects the block's spans as (stage, duration, ok, fields) tuples
+    instead of recording them, e.g. in a worker process that returns them
+    to the parent, which records them under its request (record_spans).
+    """
+    spans = []
+    token = _captured.set(spans)
+    try:
+        yield spans
+    finally:
+        _captured.reset(token)
+
+
+def record_spans(spans):
+    """Records spans collected by capture_spans in the current request."""
+    for stage, duration, ok, fields in spans:
+        observe(stage, duration, ok=ok, **fields)
+
+
+def snapshot():
+    """{stage: {"count", "sum", "buckets": [(le, cumulative count)]}}"""
+    with _histograms_lock:
+        return {
+            stage: {
+                "count": h.count,
+                "sum": h.sum,
+                "buckets": h.cumulative(),
+            }
+            for stage, h in _histograms.items()
+        }
+
+
+def reset_metrics():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+# -----------------------------
+# Prometheus Export
+# -----------------------------
+
+def render_prometheus():
+    """Histograms in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {METRIC_NAME} Latency of GPMOID pipeline stages.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+
+    for stage, data in sorted(snapshot().items()):
+        for bound, count in data["buckets"]:
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {data["count"]}')
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are not worth a log line each
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """
+    Serves /metrics on a daemon thread (once per process).
+    port defaults to GPMOID_METRICS_PORT; without either this is a no-op.
+    Returns the server, or None when not configured or the port cannot
+    be bound (e.g. held by another Streamlit process): that is logged
+    once and the app runs without the exporter.
+    """
+    global _server, _server_failed
+
+    port = port or METRICS_PORT
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                _server_failed = True
+                log.warning("Metrics exporter disabled: cannot bind %s:%s (%s)", host, port, e)
+                return None
+
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+    return _server
+
+
+# -----------------------------
+# Metrics File Summary
+# -----------------------------
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(path):
+    """{stage: {"count", "p50", "p95", "max"}} from a JSONL metrics file."""
+    durations = {}
+
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            durations.setdefault(record["stage"], []).append(record["duration_s"])
+
+    summary = {}
+    for stage, values in durations.items():
+        values.sort()
+        summary[stage] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Per-stage latency summary of a GPMOID metrics file."
+    )
+    parser.add_argument("path", nargs="?", default=METRICS_FILE)
+    args = parser.parse_args(argv)
+
+    if not args.path:
+        parser.error("no metrics file given (or set GPMOID_METRICS_FILE)")
+
+    print(f"{'stage':<16} {'count':>7} {'p50 (s)':>10} {'p95 (s)':>10} {'max (s)':>10}")
+    for stage, row in sorted(summarize(args.path).items()):
+        print(
+            f"{stage:<16} {row['count']:>7} {row['p50']:>10.4f} "
+            f"{row['p95']:>10.4f} {row['max']:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
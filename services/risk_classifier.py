@@ -0,0 +1,41 @@
+"""
+risk_classifier.py
+
+Stable risk_id derivation shared by analysis and comparison.
+Table-driven (keyword_matcher.RISK_ID_RULES) and memoized, so the same
+(description, category) always maps to the same longitudinal key.
+"""
+
+from functools import lru_cache
+
+from services.keyword_matcher import MATCHER, RISK_ID_RULES
+
+
+# Distinct (description, category) pairs remembered per process
+CLASSIFIER_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CLASSIFIER_CACHE_SIZE)
+def derive_risk_id(description: str, category: str) -> str:
+    """
+    Generates a stable risk_id for longitudinal memory.
+    Must remain deterministic: the first rule with a keyword hit wins,
+    otherwise the category itself is the key.
+    """
+    hit = MATCHER.tables_hit(f"{category} {description}")
+
+    for risk_id, _ in RISK_ID_RULES:
+        if f"risk_id:{risk_id}" in hit:
+            return risk_id
+
+    return category.lower().replace(" ", "_")
+
+
+def risk_id_for(risk: dict) -> str:
+    """
+    The risk_id attached by analyze_update; derived only for legacy
+    inputs that predate it.
+    """
+    return risk.get("risk_id") or derive_risk_id(
+        risk["description"], risk["category"]
+    )
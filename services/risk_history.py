@@ -0,0 +1,302 @@
+"""
+risk_history.py
+
+Compact per-risk history for longitudinal memory (memory v1.4).
+
+A risk's history used to be three parallel lists of repeated strings
+(periods_seen, heat_history, attention_history). It is now held in
+array-backed buffers on record["history"]:
+
+- periods   → period ordinals: indices into the project's PeriodTable
+              (memory["period_table"]), which holds each label once
+- heat      → heat codes      (Low=1, Medium=2, High=3)
+- attention → attention codes (Monitor=1, Near-term=2, Immediate=3)
+
+Code 0 stands for a missing / unrecognized value.
+
+"Seen in period P?" is a dict lookup in the period table plus a set
+lookup over the risk's ordinals (built on first use), instead of a
+scan of the period list.
+
+On disk (JSON backend, event-log snapshots) each buffer is little-endian
+base64 text, decoded only when a record is first read; records a save
+did not touch are written back exactly as they were loaded:
+
+    "period_table": ["2026-W01", "2026-W02", ...],
+    "risks": {"vendor_dependency": {..., "history":
+        {"periods": "AAAAAAEAAAA=", "heat": "AwI=", "attention": "AwI="}}}
+
+Readers go through the accessors (periods_seen, heat_history,
+attention_history, last_heat, seen_in), never the raw buffers.
+"""
+
+import sys
+import base64
+from array import array
+
+
+# -----------------------------
+# Codes
+# -----------------------------
+
+HEAT_CODES = {"Low": 1, "Medium": 2, "High": 3}
+ATTENTION_CODES = {"Monitor": 1, "Near-term": 2, "Immediate": 3}
+
+HEAT_LABELS = (None, "Low", "Medium", "High")
+ATTENTION_LABELS = (None, "Monitor", "Near-term", "Immediate")
+
+# 32-bit unsigned period ordinals, 8-bit codes
+ORDINAL_TYPECODE = "I" if array("I").itemsize == 4 else "L"
+CODE_TYPECODE = "B"
+
+
+# -----------------------------
+# Period Table
+# -----------------------------
+
+class PeriodTable:
+    """A project's period labels, each stored once; ordinal = position."""
+
+    __slots__ = ("labels", "_ordinals")
+
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+        self._ordinals = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def ordinal(self, label):
+        """Ordinal of label, or None if the project never saw it."""
+        return self._ordinals.get(label)
+
+    def intern(self, label):
+        ordinal = self._ordinals.get(label)
+        if ordinal is None:
+            ordinal = self._ordinals[label] = len(self.labels)
+            self.labels.append(label)
+        return ordinal
+
+    def labels_for(self, ordinals):
+        labels = self.labels
+        return [labels[o] for o in ordinals]
+
+    def to_json(self):
+        return list(self.labels)
+
+    def copy(self):
+        return PeriodTable(self.labels)
+
+
+# -----------------------------
+# Risk History
+# -----------------------------
+
+def _encode(buffer):
+    if sys.byteorder == "big" and buffer.itemsize > 1:
+        buffer = array(buffer.typecode, buffer)
+        buffer.byteswap()
+    return base64.b64encode(buffer.tobytes()).decode("ascii")
+
+
+def _decode(typecode, text):
+    buffer = array(typecode)
+    buffer.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big" and buffer.itemsize > 1:
+        buffer.byteswap()
+    return buffer
+
+
+class RiskHistory:
+    """
+    periods / heat / attention buffers of one risk. Observations append
+    to all three; legacy histories may hold buffers of different lengths.
+    """
+
+    __slots__ = ("periods", "heat", "attention", "_seen")
+
+    def __init__(self, periods=None, heat=None, attention=None):
+        self.periods = periods if periods is not None else array(ORDINAL_TYPECODE)
+        self.heat = heat if heat is not None else array(CODE_TYPECODE)
+        self.attention = attention if attention is not None else array(CODE_TYPECODE)
+        self._seen = None  # set of ordinals, built on the first lookup
+
+    def __len__(self):
+        return len(self.periods)
+
+    @classmethod
+    def from_lists(cls, table, periods_seen=(), heat_history=(), attention_history=()):
+        """From the pre-1.4 list representation (period labels are interned)."""
+        return cls(
+            array(ORDINAL_TYPECODE, (table.intern(p) for p in periods_seen)),
+            array(CODE_TYPECODE, (HEAT_CODES.get(h, 0) for h in heat_history)),
+            array(CODE_TYPECODE, (ATTENTION_CODES.get(a, 0) for a in attention_history)),
+        )
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            _decode(ORDINAL_TYPECODE, data.get("periods", "")),
+            _decode(CODE_TYPECODE, data.get("heat", "")),
+            _decode(CODE_TYPECODE, data.get("attention", "")),
+        )
+
+    def to_json(self):
+        return {
+            "periods": _encode(self.periods),
+            "heat": _encode(self.heat),
+            "attention": _encode(self.attention),
+        }
+
+    def copy(self):
+        return RiskHistory(self.periods[:], self.heat[:], self.attention[:])
+
+    def observe(self, ordinal, heat, attention):
+        self.periods.append(ordinal)
+        self.heat.append(HEAT_CODES.get(heat, 0))
+        self.attention.append(ATTENTION_CODES.get(attention, 0))
+        if self._seen is not None:
+            self._seen.add(ordinal)
+
+    def has_ordinal(self, ordinal):
+        if self._seen is None:
+            self._seen = set(self.periods)
+        return ordinal in self._seen
+
+    def last_heat(self):
+        return HEAT_LABELS[self.heat[-1]] if self.heat else None
+
+    def heat_labels(self, start=0):
+        return [HEAT_LABELS[code] for code in self.heat[start:]]
+
+    def attention_labels(self, start=0):
+        return [ATTENTION_LABELS[code] for code in self.attention[start:]]
+
+
+# -----------------------------
+# Record Accessors
+# -----------------------------
+
+def history_of(record):
+    """The record's RiskHistory, decoded from its stored form on first use."""
+    history = record["history"]
+    if type(history) is dict:
+        history = record["history"] = RiskHistory.from_json(history)
+    return history
+
+
+def new_history(memory, period, heat, attention):
+    """History holding a single observation (period interned in memory)."""
+    history = RiskHistory()
+    history.observe(memory["period_table"].intern(period), heat, attention)
+    return history
+
+
+def record_observation(memory, record, period, heat, attention):
+    history_of(record).observe(memory["period_table"].intern(period), heat, attention)
+
+
+def seen_in(memory, record, period):
+    """True if the risk was observed in period."""
+    ordinal = memory["period_table"].ordinal(period)
+    return ordinal is not None and history_of(record).has_ordinal(ordinal)
+
+
+def periods_seen(memory, record, start=0):
+    """Period labels the risk was observed in, oldest first."""
+    return memory["period_table"].labels_for(history_of(record).periods[start:])
+
+
+def heat_history(record, start=0):
+    return history_of(record).heat_labels(start)
+
+
+def attention_history(record, start=0):
+    return history_of(record).attention_labels(start)
+
+
+def last_heat(record):
+    """Heat at the latest observation (None if there is none)."""
+    return history_of(record).last_heat()
+
+
+# -----------------------------
+# Memory Encoding
+# -----------------------------
+
+def decode_memory(memory):
+    """
+    Stored (v1.4 JSON) form → in-memory form, in place. Only the period
+    table is built here; risk histories decode on first access.
+    """
+    memory["period_table"] = PeriodTable(memory.get("period_table") or ())
+    return memory
+
+
+def encode_memory(memory):
+    """
+    JSON-serializable copy of in-memory memory (memory is not modified).
+    Histories never decoded since loading are passed through unchanged.
+    """
+    risks = {}
+    for risk_id, record in memory.get("risks", {}).items():
+        history = record.get("history")
+        if isinstance(history, RiskHistory):
+            record = dict(record, history=history.to_json())
+        risks[risk_id] = record
+
+    table = memory.get("period_table")
+    return dict(
+        memory,
+        period_table=table.to_json() if isinstance(table, PeriodTable) else list(table or ()),
+        risks=risks,
+    )
+
+
+def copy_memory(memory):
+    """
+    Private copy of in-memory memory for a writer: records, their nested
+    dicts and history buffers are copied. Histories still in stored form
+    are shared; decoding replaces them rather than mutating them.
+    """
+    risks = {}
+    for risk_id, record in memory.get("risks", {}).items():
+        record = {
+            key: dict(value) if type(value) is dict and key != "history" else value
+            for key, value in record.items()
+        }
+        history = record.get("history")
+        if isinstance(history, RiskHistory):
+            record["history"] = history.copy()
+        risks[risk_id] = record
+
+    table = memory.get("period_table")
+    return dict(
+        memory,
+        period_table=table.copy() if isinstance(table, PeriodTable) else PeriodTable(table or ()),
+        risks=risks,
+    )
+
+
+def compact_legacy_memory(memory):
+    """
+    Pre-1.4 stored memory (list histories) → v1.4 stored form, in place.
+    Period labels are interned in sorted order (chronological for ISO weeks).
+    """
+    risks = memory.get("risks", {}).values()
+
+    labels = sorted({
+        period for risk in risks for period in risk.get("periods_seen", [])
+    })
+    table = PeriodTable(labels)
+
+    for risk in risks:
+        risk["history"] = RiskHistory.from_lists(
+            table,
+            risk.pop("periods_seen", []),
+            risk.pop("heat_history", []),
+            risk.pop("attention_history", []),
+        ).to_json()
+
+    memory["period_table"] = table.to_json()
+    return memory
@@ -0,0 +1,136 @@
+"""
+warmup.py
+
+Optional boot-time warmup: moves first-request costs to app start.
+
+Heavy dependencies are imported lazily (openai, pydantic, pandas), which
+keeps cold start fast but puts their import on the first analysis. With
+GPMOID_WARMUP=on, start_warmup() (called by the analysis pages at boot) runs
+warmup() once per process on a background thread:
+
+- client      → imports openai and creates the shared client (key set)
+- schema      → imports pydantic / schemas, builds the response schema
+- rules       → compiles the keyword matcher and risk-id rule tables
+- dataframes  → imports pandas (risk tables)
+- memory      → preloads longitudinal memory of known projects into
+                the in-process cache (GPMOID_WARMUP_PROJECTS, default 20)
+"""
+
+import os
+import time
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+WARMUP_MAX_PROJECTS = int(os.getenv("GPMOID_WARMUP_PROJECTS", "20"))
+
+
+def warmup_enabled():
+    return os.getenv("GPMOID_WARMUP", "off").lower() in ("on", "1", "true")
+
+
+# -----------------------------
+# Steps
+# -----------------------------
+
+def _warm_client():
+    from services.llm_service import get_client, retryable_errors
+
+    retryable_errors()
+    get_client()
+
+
+def _warm_schema():
+    from services.llm_validation import response_schema, enum_fields
+
+    response_schema()
+    enum_fields()
+
+
+def _warm_rules():
+    from services.keyword_matcher import TextSignals
+    from services.risk_classifier import derive_risk_id
+
+    TextSignals.from_text("Vendor approval is delayed and may impact the timeline.")
+    derive_risk_id("Dependency on external vendor approval", "Schedule")
+
+
+def _warm_dataframes():
+    import pandas  # noqa: F401
+
+
+def _warm_memory(project_ids=None):
+    from services.memory_service import list_projects, load_memory
+
+    if project_ids is None:
+        project_ids = list_projects()[:WARMUP_MAX_PROJECTS]
+
+    for project_id in project_ids:
+        load_memory(project_id)
+
+
+def warmup(project_ids=None):
+    """
+    Runs every warmup step; a failing step is logged and skipped.
+    project_ids: memory to preload (default: known projects).
+    Returns {step: seconds}.
+    """
+    steps = (
+        ("client", _warm_client),
+        ("schema", _warm_schema),
+        ("rules", _warm_rules),
+        ("dataframes", _warm_dataframes),
+        ("memory", lambda: _warm_memory(project_ids)),
+    )
+    timings = {}
+
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            log.warning("warmup step %s failed", name, exc_info=True)
+        timings[name] = time.perf_counter() - start
+
+    log.info(
+        "warmup finished: %s",
+        ", ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items())
+    )
+    return timings
+
+
+# -----------------------------
+# Boot Hook
+# -----------------------------
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def start_warmup(project_ids=None):
+    """
+    Starts warmup() on a daemon thread, once per process, when
+    GPMOID_WARMUP=on. Returns the thread, or None when disabled.
+    """
+    global _thread
+
+    if not warmup_enabled():
+        return None
+
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(
+                target=warmup,
+                args=(project_ids,),
+                name="gpmoid-warmup",
+                daemon=True
+            )
+            _thread.start()
+
+    return _thread
@@ -1,6 +1,8 @@
 import streamlit as st
-import pandas as pd
-from services.analysis_service import analyze_update
+from services.analysis_service import analyze_update_stream
+from services.memory_service import DEFAULT_PROJECT_ID, normalize_project_id
+from services.metrics import start_metrics_server
+from services.warmup import start_warmup
 
 
 # -----------------------------
@@ -12,6 +14,113 @@ st.set_page_config(
 )
 
 
+# -----------------------------
+# Render Helpers
+# -----------------------------
+
+RISK_COLUMNS = [
+    "description",
+    "category",
+    "severity",
+    "attention_level",
+    "risk_heat",
+    "response_strategy",
+    "suggested_owner",
+]
+
+
+def render_escalations(slot, escalations, final=False):
+    if escalations:
+        slot.markdown("\n".join(escalations))
+    elif final:
+        slot.write("No items require immediate escalation.")
+
+
+def render_subject(slot, subject):
+    slot.markdown(f"**Subject:** {subject}")
+
+
+def render_warnings(slot, warnings, final=False):
+    if warnings:
+        slot.markdown("\n".join(f"- 🔶 {w}" for w in warnings))
+    elif final:
+        slot.write("No early warning signals detected.")
+
+
+def render_risks(slot, risks):
+    import pandas as pd  # on first render, not at page load
+
+    df = pd.DataFrame(risks)
+    df = df[[c for c in RISK_COLUMNS if c in df.columns]]
+    slot.dataframe(df, width="stretch")
+
+
+SIGNAL_COLORS = {
+    "escalation_strong": "red",
+    "impact": "orange",
+    "early": "blue",
+}
+
+
+def highlight_signals(text, text_signals):
+    """
+    Marks the phrases that triggered normalization / escalation rules,
+    using the offsets returned with the result (no rescanning).
+    """
+    spans = []
+    for match in sorted(text_signals.get("matches", []), key=lambda m: m["start"]):
+        if spans and match["start"] < spans[-1][1]:
+            start, end, tables = spans[-1]
+            spans[-1] = (start, max(end, match["end"]), tables | set(match["tables"]))
+        else:
+            spans.append((match["start"], match["end"], set(match["tables"])))
+
+    parts = []
+    cursor = 0
+    for start, end, tables in spans:
+        color = next(c for t, c in SIGNAL_COLORS.items() if t in tables)
+        parts.append(text[cursor:start])
+        parts.append(f":{color}-background[{text[start:end]}]")
+        cursor = end
+    parts.append(text[cursor:])
+
+    return "".join(parts)
+
+
+def render_signals(text, text_signals):
+    if not text_signals or not text_signals.get("matches"):
+        st.write("No rule phrases matched in this update.")
+        return
+
+    st.caption(
+        f"Early-stage: {text_signals['is_early']} · "
+        f"Explicit impact: {text_signals['has_real_impact']} · "
+        f"Strong escalation: {text_signals['strong_signal']}"
+    )
+    st.markdown(highlight_signals(text, text_signals))
+
+
+# Prometheus /metrics endpoint, when GPMOID_METRICS_PORT is set (once per process)
+start_metrics_server()
+
+# Background warmup (client, schema, rule tables, memory), when GPMOID_WARMUP=on
+start_warmup()
+
+
+# -----------------------------
+# Project Selection
+# -----------------------------
+
+project_id = normalize_project_id(
+    st.sidebar.text_input(
+        "Project",
+        value=st.session_state.get("project_id", DEFAULT_PROJECT_ID),
+        help="Longitudinal memory is kept separately per project."
+    )
+)
+st.session_state.project_id = project_id
+
+
 # -----------------------------
 # Header
 # -----------------------------
@@ -50,18 +159,14 @@ if uploaded_file:
     # Analysis Trigger
     # -----------------------------
     if st.button("Analyze Update"):
-        with st.spinner("Analyzing project signals..."):
-            result = analyze_update(raw_text)
+
+        # Placeholders are filled progressively as the response streams in
 
         # -----------------------------
         # Escalation Summary
         # -----------------------------
         st.subheader("🚨 Escalation Summary")
-        if result.get("escalation_summary"):
-            for item in result["escalation_summary"]:
-                st.markdown(item)
-        else:
-            st.write("No items require immediate escalation.")
+        escalation_slot = st.empty()
 
         st.divider()
 
@@ -69,8 +174,8 @@ if uploaded_file:
         # Executive Email Preview
         # -----------------------------
         st.subheader("✉️ Executive Email Preview")
-        st.markdown(f"**Subject:** {result['subject']}")
-        st.write(result["body"])
+        subject_slot = st.empty()
+        body_slot = st.empty()
 
         st.divider()
 
@@ -78,11 +183,7 @@ if uploaded_file:
         # Early Warning Signals
         # -----------------------------
         st.subheader("⚠️ Early Warning Signals")
-        if result["warnings"]:
-            for w in result["warnings"]:
-                st.markdown(f"- 🔶 {w}")
-        else:
-            st.write("No early warning signals detected.")
+        warnings_slot = st.empty()
 
         st.divider()
 
@@ -90,20 +191,46 @@ if uploaded_file:
         # Risk Heat Summary
         # -----------------------------
         st.subheader("🔥 Risk Heat Summary")
+        risks_slot = st.empty()
 
-        df = pd.DataFrame(result["risks"])
-        df = df[
-            [
-                "description",
-                "category",
-                "severity",
-                "attention_level",
-                "risk_heat",
-                "response_strategy",
-                "suggested_owner",
-            ]
-        ]
-
-        st.dataframe(df, width="stretch")
+        escalations = []
+        warnings = []
+        risks = []
+        result = None
+
+        with st.spinner("Analyzing project signals..."):
+            for kind, value in analyze_update_stream(
+                raw_text,
+                project_id=project_id
+            ):
+                if kind == "subject":
+                    render_subject(subject_slot, value)
+                elif kind == "body":
+                    body_slot.write(value)
+                elif kind == "warning":
+                    warnings.append(value)
+                    render_warnings(warnings_slot, warnings)
+                elif kind == "risk":
+                    risks.append(value)
+                    render_risks(risks_slot, risks)
+                elif kind == "escalation":
+                    escalations.append(value)
+                    render_escalations(escalation_slot, escalations)
+                elif kind == "result":
+                    result = value
+
+        # Final render from the complete (or fallback) result
+        render_escalations(
+            escalation_slot,
+            result.get("escalation_summary"),
+            final=True
+        )
+        render_subject(subject_slot, result["subject"])
+        body_slot.write(result["body"])
+        render_warnings(warnings_slot, result["warnings"], final=True)
+        render_risks(risks_slot, result["risks"])
+
+        with st.expander("🔎 Rule Signals"):
+            render_signals(raw_text, result.get("text_signals"))
 
         st.success("Analysis complete.")